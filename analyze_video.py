@@ -0,0 +1,58 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+# 모듈 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import VIDEO_DIR
+from modules.recorder import BehaviorRecorder
+from modules.offline_analyzer import analyze_video
+from modules.preprocessor import process_csv_to_json
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="녹화된 영상(또는 임의의 영상 파일)을 headless로 분석해 CSV 로그/Seed를 생성합니다.")
+    parser.add_argument("videos", nargs="*", help="분석할 영상 파일 경로")
+    parser.add_argument("--all", action="store_true", help="data/videos 폴더의 모든 영상을 분석")
+    parser.add_argument("--out-dir", default=None, help="CSV 저장 폴더 (기본: data/logs)")
+    args = parser.parse_args()
+
+    videos = list(args.videos)
+    if args.all:
+        videos += sorted(glob.glob(os.path.join(VIDEO_DIR, "*.mp4")))
+    if not videos:
+        parser.print_help()
+        return
+
+    print("==================================================")
+    print("   🎞️ CLONE Offline Video Analyzer   ")
+    print("==================================================")
+
+    # 모델은 한 번만 로드해서 모든 영상에 재사용
+    recorder = BehaviorRecorder(capture_only=False)
+
+    for video_path in videos:
+        out_csv = None
+        if args.out_dir:
+            os.makedirs(args.out_dir, exist_ok=True)
+            base_name = os.path.splitext(os.path.basename(video_path))[0]
+            out_csv = os.path.join(args.out_dir, f"{base_name}.csv")
+
+        csv_path = analyze_video(video_path, recorder=recorder, out_csv=out_csv)
+        if not csv_path:
+            continue
+
+        # Capture-only 모드로 녹화된 영상이면 선택지 정보로 Seed까지 생성
+        meta_path = os.path.splitext(video_path)[0] + "_meta.json"
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            process_csv_to_json(csv_path, meta["option"], meta["session_id"], frames=recorder.last_frames)
+
+
+if __name__ == "__main__":
+    main()
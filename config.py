@@ -10,13 +10,44 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 LOG_DIR = os.path.join(DATA_DIR, "logs")
 SEED_DIR = os.path.join(DATA_DIR, "seeds")
+VIDEO_DIR = os.path.join(DATA_DIR, "videos")
 
 # 폴더 자동 생성
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(SEED_DIR, exist_ok=True)
+os.makedirs(VIDEO_DIR, exist_ok=True)
 
 # 3. 모델 설정
 GEMINI_MODEL_NAME = "gemini-2.5-flash"
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")  # 예) http://127.0.0.1:8765 (python -m modules.fake_llm_server)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini" | "fake" (네트워크 없이 결정적인 가짜 응답, 부하 테스트용)
+LLM_TIMEOUT_SEC = 60  # LLM 요청 1회당 timeout (초)
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))  # fake backend 응답 지연 (초)
+LLM_MAX_CONCURRENCY = 4  # 동시에 보내는 LLM 요청 수 (Stage 2 drafting 등)
+LLM_REQUESTS_PER_MINUTE = 60  # 전체 요청 속도 제한 (token bucket)
+LLM_MAX_RETRIES = 4  # 429/503/timeout 시 지수 백오프 재시도 횟수
+CONSOLIDATE_TOKEN_BUDGET = 24000  # Stage 2 통합 프롬프트 1회당 최대 입력 토큰 (넘으면 계층적으로 나눠서 통합)
+JUDGE_PROMPT_TOKEN_CAP = 12000  # Stage 3 판결 프롬프트 최대 입력 토큰 (넘으면 metrics를 더 압축하고, 그래도 넘으면 가이드라인을 자름)
 
 # 4. 녹화 설정
-USE_POSE = True  # MediaPipe Pose 사용 여부
\ No newline at end of file
+USE_POSE = True  # MediaPipe Pose 사용 여부
+CAPTURE_ONLY = False  # True면 녹화 중에는 영상만 저장하고, 분석은 세션 종료 후 오프라인으로 수행
+FACE_DETECT_INTERVAL = 5  # N프레임마다 MTCNN 전체 검출, 사이 프레임은 얼굴 추적 (1이면 매 프레임 검출)
+EMOTION_BATCH_SIZE = 4  # 감정 인식 micro-batch 크기
+TARGET_FPS = None  # 예) 10 -> 분석 fps가 목표보다 낮으면 입력 축소/Lite Pose/검출 주기/감정 skip 순으로 품질을 자동 조절
+LOG_FORMAT = "csv"  # "parquet"이면 CSV와 함께 float32 컬럼형 Parquet 로그도 저장 (pyarrow 필요)
+SHOW_TIMING_OVERLAY = False  # Monitor 창에 단계별 지연(ms) 오버레이 표시
+PROFILE_NEXT_TRIAL = False  # True면 다음 Trial 한 번의 추론 워커를 cProfile로 덤프 (data/logs/*_worker.prof)
+
+# 5. 상주 추론 서버 설정 (python -m modules.inference_server 로 실행)
+USE_INFERENCE_SERVER = True  # 서버가 떠 있으면 모델을 로드하지 않고 서버에 연결 (없으면 로컬 로드)
+INFERENCE_SERVER_ADDRESS = ("127.0.0.1", int(os.getenv("CLONE_INFERENCE_PORT", "6010")))
+# 인증 키: CLONE_INFERENCE_AUTHKEY 환경 변수가 없으면 설치마다 무작위 키를 만들어 이 파일(권한 0600)에 저장
+INFERENCE_SERVER_KEY_PATH = os.path.join(DATA_DIR, "inference_server.key")
+
+# 6. 캐시 설정 (data/cache, SQLite + LRU 용량 제한)
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+USE_FEATURE_CACHE = True  # 같은 로그(내용 해시)+같은 특징 버전이면 behavior_metrics를 다시 계산하지 않음
+FEATURE_CACHE_MAX_MB = 64
+USE_LLM_CACHE = True  # 입력(프롬프트/데이터/모델)이 같으면 LLM 응답(Stage 2 draft 등)을 재사용
+LLM_CACHE_MAX_MB = 32
\ No newline at end of file
@@ -3,14 +3,19 @@ import uuid
 import os
 import sys
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 모듈 경로 설정
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from modules.stimulus import generate_explanations
+from modules.stimulus import stream_explanations
 from modules.recorder import BehaviorRecorder
-from modules.preprocessor import process_csv_to_json
+from modules.seed_worker import submit_seed, wait_for_session
+from modules.offline_analyzer import analyze_video
 from modules.judge import evaluate_session  # [New] 판사 에이전트 가져오기
+from modules import llm_client
 
 def main():
     print("\n" + "="*60)
@@ -47,31 +52,46 @@ def main():
         return
 
     # ---------------------------------------------------------
-    # 2. LLM 설명 생성 (Context 반영)
+    # 2. 실험 세션 준비 + LLM 설명 생성 (Context 반영)
     # ---------------------------------------------------------
+    # 설명은 생성되는 순서대로 바로 Trial에 쓰이므로, 순서 효과 방지용 셔플은 요청 전에 수행
+    # (option id는 셔플과 상관없이 입력 순서 기준 opt1, opt2, ... 로 유지)
+    order = list(range(len(user_options)))
+    random.shuffle(order)
+    trial_options = [user_options[i] for i in order]
+    session_id = str(uuid.uuid4())[:8]
+    print(f"[SYSTEM] 세션 ID 생성됨: {session_id}")
+
     print("\n" + "-"*60)
     print("[AI] 🤖 큐레이터가 상황에 맞춰 선택지를 분석 중입니다... (잠시만 기다려주세요)")
-    
-    llm_result = generate_explanations(user_options, user_context)
-    
-    if not llm_result or "options" not in llm_result:
-        print("[ERROR] LLM 분석 실패. 네트워크 상태나 API Key를 확인하세요.")
-        return
-    
-    options_data = llm_result["options"]
-    
+
+    # 녹화기 모델 로딩과 LLM 스트리밍을 동시에 시작 (두 대기 시간이 겹치도록)
+    loader = ThreadPoolExecutor(max_workers=1)
+    recorder_future = loader.submit(BehaviorRecorder)
+    loader.shutdown(wait=False)
+
+    option_queue = queue.Queue()  # 설명이 완성된 option이 하나씩 들어옴 (끝나면 None)
+
+    def stream_options():
+        # 응답은 프롬프트(셔플된) 순서대로 오므로 k번째 설명 = trial_options[k]
+        for k, option in enumerate(stream_explanations(trial_options, user_context)):
+            if k < len(order):
+                option['id'] = f"opt{order[k] + 1}"
+            option_queue.put(option)
+        option_queue.put(None)
+
+    threading.Thread(target=stream_options, daemon=True).start()
+
     # ---------------------------------------------------------
-    # 3. 실험 세션 준비
+    # 3. 녹화 장치 준비
     # ---------------------------------------------------------
-    random.shuffle(options_data) # 순서 섞기
-    session_id = str(uuid.uuid4())[:8]
-    print(f"[SYSTEM] 세션 ID 생성됨: {session_id}")
-    
+    t0 = time.time()
     try:
-        recorder = BehaviorRecorder()
+        recorder = recorder_future.result()
     except Exception as e:
         print(f"[ERROR] 녹화 장치 초기화 실패: {e}")
         return
+    print(f"[INFO] Recorder ready (추가 대기 {time.time() - t0:.1f}s, LLM 설명 생성과 동시 진행)")
 
     # ---------------------------------------------------------
     # 4. 측정 루프 (Recorder)
@@ -82,11 +102,22 @@ def main():
     print("   2. [Space]를 눌러 읽기 종료 (녹화 OFF & 저장)")
     print("="*60)
 
-    # 데이터가 정상적으로 최소 1개 이상 저장되었는지 확인하는 플래그
-    data_collected = False
+    # Capture-only 모드: 녹화 중에는 영상만 저장하고, 분석은 모든 Trial이 끝난 뒤 수행
+    captured_videos = []
 
-    for idx, opt in enumerate(options_data):
-        print(f"\n[Trial {idx+1}/{len(options_data)}] 주제: {opt['title']}")
+    idx = 0
+    while True:
+        # 다음 선택지의 설명이 완성될 때까지만 대기 (나머지는 녹화 중에 계속 생성됨)
+        opt = option_queue.get()
+        if opt is None:
+            if idx == 0:
+                print("[ERROR] LLM 분석 실패. 네트워크 상태나 API Key를 확인하세요.")
+                return
+            if idx < len(user_options):
+                print(f"\n[WARN] 설명이 생성된 선택지가 {idx}/{len(user_options)}개뿐입니다.")
+            break
+        idx += 1
+        print(f"\n[Trial {idx}/{len(user_options)}] 주제: {opt['title']}")
         
         # Context 정보 주입
         opt['user_context'] = user_context
@@ -94,18 +125,30 @@ def main():
         # 녹화 실행
         csv_path = recorder.record_session(opt, session_id)
         
-        if csv_path:
-            # 전처리 및 JSON 생성
-            json_path = process_csv_to_json(csv_path, opt, session_id)
-            if json_path:
-                print(f"   -> [데이터 확보 완료]")
-                data_collected = True
-            else:
-                print("   -> [주의] 유효한 데이터가 생성되지 않았습니다 (너무 짧음 등).")
+        if csv_path and recorder.capture_only:
+            captured_videos.append((csv_path, opt))
+            print(f"   -> [영상 저장 완료] 분석은 실험 종료 후 진행됩니다.")
+        elif csv_path:
+            # 전처리 및 JSON 생성은 백그라운드에서 (다음 Trial 녹화와 동시에 진행)
+            submit_seed(csv_path, opt, session_id, frames=recorder.last_frames, metrics=recorder.last_metrics)
+            print(f"   -> [녹화 완료] Seed는 백그라운드에서 생성됩니다.")
         else:
             print("\n[STOP] 사용자에 의해 실험이 중단되었습니다.")
             break
 
+    if captured_videos:
+        print("\n[Offline] 녹화된 영상을 분석합니다... (모델 로딩 포함)")
+        analyzer = BehaviorRecorder(capture_only=False)
+        for video_path, opt in captured_videos:
+            csv_path = analyze_video(video_path, recorder=analyzer)
+            if csv_path:
+                # 다음 영상을 분석하는 동안 Seed 생성
+                submit_seed(csv_path, opt, session_id, frames=analyzer.last_frames)
+
+    # 백그라운드 Seed 생성 완료 대기 (실패한 선택지는 경고로 보고)
+    seeds, failed = wait_for_session(session_id)
+    data_collected = bool(seeds)
+
     # ---------------------------------------------------------
     # 5. 최종 추론 및 추천 (The Judge)
     # ---------------------------------------------------------
@@ -135,5 +178,7 @@ def main():
     else:
         print("\n[WARN] 분석할 데이터가 없어 추천을 건너뜁니다.")
 
+    llm_client.print_latency_stats()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
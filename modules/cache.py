@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def content_key(*parts):
+    """여러 구성요소(문자열/숫자/JSON 직렬화 가능한 값)로 캐시 키(sha256) 생성"""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, (str, bytes)):
+            part = json.dumps(part, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(part)
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class DiskCache:
+    """
+    SQLite 파일 하나에 JSON 값을 zlib 압축해 저장하는 content-addressed 캐시.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은(LRU) 항목부터 지웁니다.
+    호출마다 연결을 새로 열기 때문에 여러 스레드/프로세스(ProcessPoolExecutor)에서 같이 써도 됩니다.
+    """
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON cache(last_access)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # 블록이 끝나면 commit (예외 시 rollback)
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key, default=None):
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"[WARN] Cache read failed ({os.path.basename(self.path)}): {e}")
+            row = None
+
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return default
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, key, value):
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time())
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"[WARN] Cache write failed ({os.path.basename(self.path)}): {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM cache ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", stale)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
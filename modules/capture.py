@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+# 캡처 스레드가 찍어 보내는 프레임 단위 (index, 캡처 시각, BGR 이미지)
+Frame = namedtuple("Frame", ["index", "timestamp", "image"])
+
+
+class LatestFrameQueue:
+    """
+    크기 1짜리 bounded queue. 새 프레임이 들어오면 아직 안 꺼낸 이전 프레임은 버립니다.
+    소비자(추론/UI)가 느려도 항상 '가장 최근' 프레임만 처리하게 됩니다.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """새 프레임이 올 때까지 대기. 스트림이 닫혔거나 timeout이면 None."""
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class CameraStream:
+    """
+    웹캠(또는 영상 파일)을 별도 스레드에서 계속 읽어 타임스탬프를 찍고,
+    구독자(LatestFrameQueue)들에게 최신 프레임을 뿌려주는 캡처 스레드.
+    """
+    def __init__(self, source=0, api=cv2.CAP_DSHOW, timer=None):
+        self.cap = cv2.VideoCapture(source, api)
+        self.timer = timer  # StageTimer (카메라 read 지연 측정)
+        self._subscribers = []
+        self._thread = None
+        self._running = False
+        self.frame_count = 0
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    @property
+    def fps(self):
+        """장치가 보고하는 명목 fps (알 수 없으면 30)"""
+        return self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def subscribe(self):
+        q = LatestFrameQueue()
+        self._subscribers.append(q)
+        return q
+
+    def add_subscriber(self, sink):
+        """put(frame)/close()를 가진 임의의 소비자(VideoSink 등)를 붙입니다."""
+        self._subscribers.append(sink)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CameraStream", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            t0 = time.perf_counter()
+            ret, image = self.cap.read()
+            if self.timer is not None:
+                self.timer.record("camera_read", time.perf_counter() - t0)
+            if not ret:
+                break
+            frame = Frame(self.frame_count, time.time(), image)
+            self.frame_count += 1
+            for q in self._subscribers:
+                q.put(frame)
+        self._running = False
+        for q in self._subscribers:
+            q.close()
+
+    @property
+    def running(self):
+        return self._running
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.cap.release()
+
+
+class VideoSink:
+    """
+    [Capture-only 모드] 분석 없이 원본 프레임을 압축 영상 + 프레임 타임스탬프로 저장합니다.
+    CameraStream의 구독자로 붙으며, 인코딩은 별도 스레드에서 수행해 캡처를 막지 않습니다.
+    인코더가 밀려 큐가 가득 차면 프레임을 버리고 dropped로 셉니다 (타임스탬프 파일에 간격으로 남음).
+    """
+    def __init__(self, video_path, fps=30.0, fourcc="mp4v"):
+        self.video_path = video_path
+        self.timestamps_path = os.path.splitext(video_path)[0] + "_frames.csv"
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.frames_written = 0
+        self.dropped = 0
+        self._start_time = None
+        self._queue = queue.Queue(maxsize=256)
+        self._thread = threading.Thread(target=self._run, name="VideoSink", daemon=True)
+        self._thread.start()
+
+    def start_recording(self, start_time):
+        """start_time 이후에 캡처된 프레임부터 저장"""
+        self._start_time = start_time
+
+    def put(self, frame):
+        if self._start_time is None or frame.timestamp < self._start_time:
+            return
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._queue.put(None)
+
+    def _run(self):
+        writer = None
+        ts_file = None
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                if writer is None:
+                    h, w = frame.image.shape[:2]
+                    writer = cv2.VideoWriter(self.video_path, self.fourcc, self.fps, (w, h))
+                    ts_file = open(self.timestamps_path, "w", encoding="utf-8")
+                    ts_file.write("frame,t\n")
+                writer.write(frame.image)
+                ts_file.write(f"{self.frames_written},{frame.timestamp - self._start_time}\n")
+                self.frames_written += 1
+        finally:
+            if writer is not None:
+                writer.release()
+            if ts_file is not None:
+                ts_file.close()
+
+    def finish(self):
+        """남은 프레임 인코딩이 끝날 때까지 대기. 저장된 영상 경로(없으면 None)를 반환."""
+        self._thread.join()
+        return self.video_path if self.frames_written else None
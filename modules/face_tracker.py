@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+
+
+class FaceTracker:
+    """
+    매 프레임 MTCNN 전체 검출 대신, N프레임마다(또는 추적 실패 시)만 검출하고
+    그 사이에는 직전 얼굴 영역을 템플릿 매칭으로 가볍게 따라가는 추적기.
+    """
+    def __init__(self, detect_fn, detect_interval=5, search_margin=0.5, min_score=0.6):
+        # detect_fn(frame_rgb) -> (N, 4) 박스 배열 [x1, y1, x2, y2] (큰 얼굴 우선) 또는 None
+        self.detect_fn = detect_fn
+        self.detect_interval = max(1, int(detect_interval))
+        self.search_margin = search_margin
+        self.min_score = min_score
+        self.interval_x = 1  # 검출 주기 배수 (QualityScheduler가 조절)
+        self.reset()
+
+    def reset(self):
+        self.box = None
+        self._template = None
+        self._since_detect = 0
+        self.detections = 0
+
+    def _detect(self, frame_rgb, gray):
+        self._since_detect = 0
+        self.detections += 1
+        boxes = self.detect_fn(frame_rgb)
+        if boxes is None or len(boxes) == 0:
+            self.box = None
+            self._template = None
+            return None
+
+        h, w = gray.shape
+        x1, y1, x2, y2 = boxes[0]
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(w, int(x2)), min(h, int(y2))
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            self.box = None
+            self._template = None
+            return None
+
+        self.box = (x1, y1, x2, y2)
+        self._template = gray[y1:y2, x1:x2].copy()
+        return self.box
+
+    def _track(self, gray):
+        """직전 박스 주변 탐색 영역에서 템플릿 매칭. 점수가 낮으면 추적 실패(None)."""
+        x1, y1, x2, y2 = self.box
+        bw, bh = x2 - x1, y2 - y1
+        mx, my = int(bw * self.search_margin), int(bh * self.search_margin)
+        h, w = gray.shape
+        sx1, sy1 = max(0, x1 - mx), max(0, y1 - my)
+        sx2, sy2 = min(w, x2 + mx), min(h, y2 + my)
+
+        search = gray[sy1:sy2, sx1:sx2]
+        if search.shape[0] < bh or search.shape[1] < bw:
+            return None
+
+        scores = cv2.matchTemplate(search, self._template, cv2.TM_CCOEFF_NORMED)
+        _, max_score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if max_score < self.min_score:
+            return None
+
+        nx1, ny1 = sx1 + dx, sy1 + dy
+        self.box = (nx1, ny1, nx1 + bw, ny1 + bh)
+        return self.box
+
+    def update(self, frame_rgb):
+        """현재 프레임의 얼굴 박스 (x1, y1, x2, y2) 또는 None"""
+        gray = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2GRAY)
+        self._since_detect += 1
+
+        if self.box is None or self._since_detect >= self.detect_interval * self.interval_x:
+            return self._detect(frame_rgb, gray)
+
+        if self._track(gray) is None:
+            # 추적 손실 -> 즉시 재검출
+            return self._detect(frame_rgb, gray)
+        return self.box
+
+
+def crop_face(frame_rgb, box, size=160):
+    """MTCNN(image_size=160, margin=0)이 잘라주던 것과 같은 크기의 얼굴 crop"""
+    x1, y1, x2, y2 = box
+    face = frame_rgb[y1:y2, x1:x2]
+    return cv2.resize(face, (size, size), interpolation=cv2.INTER_AREA)
+
+
+class EmotionBatcher:
+    """
+    얼굴 crop을 모아서 predict_emotions를 micro-batch로 호출합니다.
+    submit()은 배치가 찼을 때 완료된 (payload, probs) 목록을 돌려주고,
+    남은 crop은 flush()로 마저 처리합니다.
+    """
+    def __init__(self, predict_fn, batch_size=4):
+        # predict_fn(list of crops) -> (N, 8) 확률 배열
+        self.predict_fn = predict_fn
+        self.batch_size = max(1, int(batch_size))
+        self._crops = []
+        self._payloads = []
+
+    @property
+    def pending(self):
+        """아직 추론되지 않은 crop 수"""
+        return len(self._crops)
+
+    def submit(self, crop, payload):
+        self._crops.append(crop)
+        self._payloads.append(payload)
+        if len(self._crops) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self._crops:
+            return []
+        probs = np.asarray(self.predict_fn(self._crops))
+        done = list(zip(self._payloads, probs))
+        self._crops = []
+        self._payloads = []
+        return done
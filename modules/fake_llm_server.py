@@ -0,0 +1,94 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 로컬 테스트용 가짜 Gemini REST 엔드포인트.
+#   python -m modules.fake_llm_server --port 8765 --latency 0.5 --fail-rate 0.2
+#   GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python stage2_make_guideline.py
+# 같은 프롬프트에는 항상 같은 응답을 돌려주고, fail-rate 비율로 429를 돌려줘 재시도 로직을 확인할 수 있습니다.
+
+GENERATE_PATH = re.compile(r"^/v1beta/models/(?P<model>[^/:]+):generateContent")
+
+
+def fake_response_text(prompt):
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"[fake-llm {digest}] Step 1: Evaluate posture. Step 2: Check gaze. Step 3: Weigh emotions."
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    stats = {"requests": 0, "failed": 0}
+    stats_lock = threading.Lock()
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        m = GENERATE_PATH.match(self.path)
+        if not m:
+            self._send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "\n".join(part.get("text", "")
+                           for content in request.get("contents", [])
+                           for part in content.get("parts", []))
+
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            fail = random.random() < self.fail_rate
+            if fail:
+                self.stats["failed"] += 1
+
+        time.sleep(self.latency)
+        if fail:
+            self._send_json(429, {"error": {"code": 429, "message": "fake rate limit",
+                                            "status": "RESOURCE_EXHAUSTED"}})
+            return
+
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"parts": [{"text": fake_response_text(prompt)}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 24}
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, latency=0.0, fail_rate=0.0):
+    FakeGeminiHandler.latency = latency
+    FakeGeminiHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    print(f"[FAKE-LLM] Listening on http://{host}:{port} (latency {latency}s, fail rate {fail_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[FAKE-LLM] {FakeGeminiHandler.stats}")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 테스트용 가짜 Gemini generateContent 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연 (초)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="429를 돌려줄 비율 (0~1)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.latency, args.fail_rate)
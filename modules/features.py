@@ -0,0 +1,191 @@
+import fnmatch
+from collections import namedtuple
+
+import numpy as np
+
+# ---------------------------------------------------------
+# 1. Feature Registry
+# ---------------------------------------------------------
+# 시계열 특징은 @feature로 등록하면 compute_registered_features()가 한 번에 계산해
+# behavior_metrics에 넣어줍니다. 각 특징은 필요한 입력 컬럼(와일드카드 가능)과
+# 쓰는 (컬럼, rolling window) 쌍을 선언하고, 공유 float32 배열(FeatureFrame)에서 벡터 연산만 합니다.
+
+FeatureSpec = namedtuple("FeatureSpec", ["name", "fn", "inputs", "windows", "min_frames"])
+
+FEATURES = {}
+
+
+def feature(name, inputs, windows=(), min_frames=5):
+    """
+    특징 등록 데코레이터.
+    inputs: 필요한 컬럼 (예: "nose_y", "prob_*"). 로그에 하나라도 없으면 그 특징은 건너뜀
+    windows: 미리 계산해 둘 rolling mean (컬럼, 크기) 쌍 (예: [("nose_y", 15)], 여러 특징이 같은 쌍을 쓰면 한 번만 계산)
+    """
+    def register(fn):
+        FEATURES[name] = FeatureSpec(name, fn, tuple(inputs), tuple((c, int(w)) for c, w in windows), min_frames)
+        return fn
+    return register
+
+
+class FeatureFrame:
+    """
+    등록된 특징들이 공유하는 입력: 필요한 컬럼만 모은 (frames x columns) float32 배열.
+    rolling mean은 (컬럼, window)별로 누적합으로 한 번만 계산해 캐시합니다.
+    """
+    def __init__(self, df, columns):
+        self.columns = list(columns)
+        self.col = {name: i for i, name in enumerate(self.columns)}
+        self.values = df[self.columns].to_numpy(dtype=np.float32)
+        self.n = len(self.values)
+        self._rolling = {}
+
+    def __getitem__(self, name):
+        return self.values[:, self.col[name]]
+
+    def match(self, pattern):
+        return [c for c in self.columns if fnmatch.fnmatchcase(c, pattern)]
+
+    def rolling_mean(self, name, window):
+        """NaN을 건너뛰는 trailing rolling mean (min_periods=1)"""
+        key = (name, window)
+        if key not in self._rolling:
+            x = self[name].astype(np.float64)
+            valid = ~np.isnan(x)
+            sums = np.concatenate([[0.0], np.cumsum(np.where(valid, x, 0.0))])
+            counts = np.concatenate([[0], np.cumsum(valid)])
+            end = np.arange(1, self.n + 1)
+            start = np.maximum(end - window, 0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self._rolling[key] = ((sums[end] - sums[start]) / (counts[end] - counts[start])).astype(np.float32)
+        return self._rolling[key]
+
+
+def _resolve_inputs(spec, available):
+    columns = []
+    for pattern in spec.inputs:
+        matched = [c for c in available if fnmatch.fnmatchcase(c, pattern)]
+        if not matched:
+            return None
+        columns += matched
+    return columns
+
+
+def compute_registered_features(df, names=None):
+    """
+    df(-999는 이미 NaN)에 대해 등록된 특징을 모두 계산. Returns: {feature name: value}
+    입력 컬럼이 없거나 프레임 수가 모자란 특징은 결과에서 빠집니다.
+    """
+    specs = [FEATURES[name] for name in (names or FEATURES)]
+    available = list(df.columns)
+
+    runnable = []
+    needed = []
+    for spec in specs:
+        columns = _resolve_inputs(spec, available)
+        if columns is None or len(df) < spec.min_frames:
+            continue
+        runnable.append(spec)
+        needed += [c for c in columns if c not in needed]
+    if not runnable:
+        return {}
+
+    # 모든 특징이 같은 배열/rolling 결과를 공유 (선언된 (컬럼, window) 쌍만 한 번씩 계산)
+    frame = FeatureFrame(df, needed)
+    for spec in runnable:
+        for column, window in spec.windows:
+            if column in frame.col:
+                frame.rolling_mean(column, window)
+
+    results = {}
+    for spec in runnable:
+        value = spec.fn(frame)
+        if value is not None:
+            results[spec.name] = value
+    return results
+
+
+# ---------------------------------------------------------
+# 2. Registered Features
+# ---------------------------------------------------------
+
+def _uniform_resample(t, x, max_hz=30.0):
+    """fps가 일정하지 않은 로그를 FFT용 등간격 시계열로 보간. Returns: (등간격 값, 샘플링 레이트)"""
+    valid = ~np.isnan(t) & ~np.isnan(x)
+    t, x = t[valid].astype(np.float64), x[valid].astype(np.float64)
+    if len(t) < 2:
+        return None, 0.0
+    dt = np.median(np.diff(t))
+    if dt <= 0:
+        return None, 0.0
+    fs = min(1.0 / dt, max_hz)
+    grid = np.arange(t[0], t[-1], 1.0 / fs)
+    return np.interp(grid, t, x), fs
+
+
+@feature("nod_frequency", inputs=["t", "nose_y"], windows=[("nose_y", 15)], min_frames=16)
+def nod_frequency(frame):
+    """
+    nose_y의 FFT로 끄덕임 주기 추정. 느린 자세 변화(rolling mean 15)를 빼고
+    0.5~3Hz 대역에서 가장 강한 주파수와 그 대역이 차지하는 에너지 비율을 반환.
+    """
+    y = frame["nose_y"] - frame.rolling_mean("nose_y", 15)
+    signal, fs = _uniform_resample(frame["t"], y)
+    if signal is None or len(signal) < 16:
+        return None
+
+    signal = (signal - signal.mean()) * np.hanning(len(signal))
+    power = np.abs(np.fft.rfft(signal)) ** 2
+    freqs = np.fft.rfftfreq(len(signal), d=1.0 / fs)
+    band = (freqs >= 0.5) & (freqs <= 3.0)
+    total = power[1:].sum()
+    if not band.any() or total <= 0:
+        return None
+
+    peak = np.argmax(np.where(band, power, -1.0))
+    return {
+        "dominant_hz": round(float(freqs[peak]), 3),
+        "band_power_ratio": round(float(power[band].sum() / total), 3)
+    }
+
+
+@feature("head_motion_energy", inputs=["t", "nose_x", "nose_y"])
+def head_motion_energy(frame):
+    """초당 코 이동 거리 (정규화 좌표). 제스처 분산과 달리 움직임의 '양'을 봅니다."""
+    t = frame["t"]
+    step = np.hypot(np.diff(frame["nose_x"]), np.diff(frame["nose_y"]))
+    duration = np.nanmax(t) - np.nanmin(t)
+    if not np.isfinite(duration) or duration <= 0:
+        return None
+    return round(float(np.nansum(step) / duration), 4)
+
+
+@feature("emotion_trajectory", inputs=["t", "prob_*"])
+def emotion_trajectory(frame):
+    """초 단위 평균 감정 확률의 top emotion 시퀀스와 전환 횟수 (감정이 없는 구간은 "none")"""
+    prob_cols = frame.match("prob_*")
+    probs = frame.values[:, [frame.col[c] for c in prob_cols]].astype(np.float64)
+    t = frame["t"]
+    keep = ~np.isnan(t)
+    if not keep.any():
+        return None
+
+    sec = np.floor(t[keep]).astype(np.int64)
+    sec -= sec.min()
+    probs = probs[keep]
+    valid = ~np.isnan(probs)
+
+    n_sec = int(sec.max()) + 1
+    sums = np.zeros((n_sec, len(prob_cols)))
+    counts = np.zeros((n_sec, len(prob_cols)))
+    np.add.at(sums, sec, np.where(valid, probs, 0.0))
+    np.add.at(counts, sec, valid)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    has_emotion = (counts > 0).any(axis=1)
+    top = np.argmax(np.where(np.isnan(means), -np.inf, means), axis=1)
+
+    labels = [prob_cols[k].replace("prob_", "") if ok else "none" for k, ok in zip(top, has_emotion)]
+    detected = [label for label in labels if label != "none"]
+    shifts = sum(1 for a, b in zip(detected, detected[1:]) if a != b)
+    return {"per_second": labels, "shifts": shifts}
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+
+class FrameBuffer:
+    """
+    녹화 프레임 저장소. 프레임마다 dict를 만들지 않고, csv_fieldnames 순서의 고정 컬럼을 가진
+    미리 할당된 float64 배열에 바로 값을 씁니다. (용량이 차면 2배로 늘림)
+    문자열 컬럼(top_emotion)은 emotion_labels 인덱스 코드(-1 = "none")로 저장합니다.
+    """
+    def __init__(self, fieldnames, emotion_labels, defaults=None, string_field="top_emotion", capacity=1024):
+        self.fieldnames = list(fieldnames)
+        self.string_field = string_field
+        self.emotion_labels = list(emotion_labels)
+        self.columns = [name for name in self.fieldnames if name != string_field]
+        self.col = {name: i for i, name in enumerate(self.columns)}
+
+        # 감정 확률 컬럼은 연속 구간이어야 한 번에(vectorized) 채울 수 있음
+        prob_idx = [self.col[f"prob_{label}"] for label in self.emotion_labels]
+        self.prob_slice = slice(prob_idx[0], prob_idx[-1] + 1)
+
+        self.defaults = np.zeros(len(self.columns))
+        for name, value in (defaults or {}).items():
+            self.defaults[self.col[name]] = value
+
+        self.values = np.empty((capacity, len(self.columns)), dtype=np.float64)
+        self.codes = np.empty(capacity, dtype=np.int8)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        capacity = self.values.shape[0] * 2
+        values = np.empty((capacity, len(self.columns)), dtype=np.float64)
+        codes = np.empty(capacity, dtype=np.int8)
+        values[:self.n] = self.values[:self.n]
+        codes[:self.n] = self.codes[:self.n]
+        self.values, self.codes = values, codes
+
+    def append(self):
+        """기본값으로 채운 새 행을 추가하고 그 인덱스를 반환"""
+        if self.n == self.values.shape[0]:
+            self._grow()
+        i = self.n
+        self.values[i] = self.defaults
+        self.codes[i] = -1
+        self.n += 1
+        return i
+
+    def set_probs(self, i, probs):
+        """감정 확률(0~1)을 % 단위로 한 번에 기록하고 top emotion 코드를 갱신"""
+        self.values[i, self.prob_slice] = probs
+        self.values[i, self.prob_slice] *= 100
+        code = int(np.argmax(probs))
+        self.codes[i] = code
+        return self.emotion_labels[code]
+
+    def to_dataframe(self, start=0, stop=None):
+        """[start, stop) 구간을 csv_fieldnames 순서의 DataFrame으로 (CSV 직렬화 없이) 반환"""
+        stop = self.n if stop is None else stop
+        df = pd.DataFrame(self.values[start:stop].copy(), columns=self.columns)
+        labels = np.array(self.emotion_labels + ["none"], dtype=object)
+        df[self.string_field] = labels[self.codes[start:stop]]
+        return df[self.fieldnames]
@@ -2,11 +2,28 @@ import os
 import json
 import glob
 import time
-import google.generativeai as genai
-from config import GEMINI_API_KEY, SEED_DIR, BASE_DIR
-
-genai.configure(api_key=GEMINI_API_KEY)
-MODEL_NAME = "gemini-2.5-flash"
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    SEED_DIR, BASE_DIR, CACHE_DIR,
+    LLM_MAX_CONCURRENCY, USE_LLM_CACHE, LLM_CACHE_MAX_MB, CONSOLIDATE_TOKEN_BUDGET
+)
+from modules import llm_client
+from modules.cache import DiskCache, content_key
+from modules.tokens import estimate_tokens, batch_by_tokens, truncate_to_tokens
+
+# Seed별 draft 캐시: 라벨/metrics/점수/프롬프트/모델이 그대로면 LLM을 다시 호출하지 않음
+_draft_cache = None
+_draft_cache_lock = threading.Lock()
+
+def draft_cache():
+    """draft 캐시 (data/cache/drafts.sqlite, 처음 쓸 때 생성). USE_LLM_CACHE=False면 None"""
+    global _draft_cache
+    with _draft_cache_lock:
+        if _draft_cache is None and USE_LLM_CACHE:
+            _draft_cache = DiskCache(os.path.join(CACHE_DIR, "drafts.sqlite"),
+                                     max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024)
+        return _draft_cache
 
 # -----------------------------------------------------------------------------
 # Prompt 1: Drafting Phase (Appendix B.2 Table 3 참조) 
@@ -84,31 +101,118 @@ def create_draft_for_case(seed_data):
         score=score
     )
     
-    model = genai.GenerativeModel(MODEL_NAME, system_instruction=DRAFT_SYSTEM_PROMPT)
+    cache = draft_cache()
+    cache_key = None
+    if cache is not None:
+        # backend/엔드포인트/모델도 키에 포함: fake 응답이 실제 API 실행에서 재사용되지 않도록
+        cache_key = content_key("draft", expert_analysis, seed_data.get('behavior_metrics', {}), score,
+                                DRAFT_SYSTEM_PROMPT, DRAFT_USER_TEMPLATE, llm_client.cache_scope())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        res = model.generate_content(prompt)
-        return res.text.strip()
+        res = llm_client.generate("draft", prompt, system_instruction=DRAFT_SYSTEM_PROMPT, label="Draft")
+        draft = res.text.strip()
     except Exception as e:
         print(f"[Draft Error] {e}")
         return None
 
-def create_guideline():
-    files = glob.glob(os.path.join(SEED_DIR, "*.json"))
-    drafts = []
+    if cache_key is not None:
+        cache.set(cache_key, draft)
+    return draft
+
+def load_labeled_seeds():
+    """expert_analysis가 달린 Seed만, 파일명 순서로 (실행할 때마다 같은 순서)"""
+    cases = []
+    for fpath in sorted(glob.glob(os.path.join(SEED_DIR, "*.json"))):
+        with open(fpath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("expert_analysis"):
+            cases.append((fpath, data))
+    return cases
+
+DRAFT_SEPARATOR = "\n"  # 통합 프롬프트에서 draft 사이 구분자
+MIN_INPUT_SHARE = 256  # 입력을 균등하게 자를 때 입력 하나당 최소 토큰 (이보다 작으면 빈 입력이 되지 않도록 한 번 더 묶어서 통합)
+
+def consolidate_drafts(drafts):
+    """draft 묶음 하나를 CONSOLIDATE 프롬프트로 통합. 실패하면 예외를 그대로 올림."""
+    full_input = CONSOLIDATE_USER_TEMPLATE.format(drafts=DRAFT_SEPARATOR.join(drafts))
+    response = llm_client.generate("consolidate", full_input, system_instruction=CONSOLIDATE_SYSTEM_PROMPT,
+                                   label="Consolidate")
+    return response.text
+
+def consolidate_hierarchical(drafts, budget=CONSOLIDATE_TOKEN_BUDGET, max_workers=LLM_MAX_CONCURRENCY,
+                             level=1, prev_total=None):
+    """
+    Map-reduce 통합: 전체 draft가 토큰 예산을 넘으면 예산 크기의 묶음으로 나눠 병렬로 통합하고,
+    그 중간 가이드라인들을 다시 같은 방식으로 합쳐 한 번에 들어갈 때까지 반복합니다.
+    어떤 통합 호출도 budget(추정 토큰)을 넘지 않습니다.
+    """
+    overhead = estimate_tokens(CONSOLIDATE_SYSTEM_PROMPT + CONSOLIDATE_USER_TEMPLATE)
+    room = budget - overhead
+    if room < 2 * (MIN_INPUT_SHARE + estimate_tokens(DRAFT_SEPARATOR)):
+        raise ValueError(f"CONSOLIDATE_TOKEN_BUDGET {budget} is too small (prompt overhead ~{overhead} tokens)")
+
+    def joined_tokens(texts):
+        return estimate_tokens(DRAFT_SEPARATOR.join(texts))
+
+    # 혼자서도 예산을 넘는 draft는 잘라서 단독 묶음이 예산 안에 들어가게 함
+    oversized = sum(1 for d in drafts if estimate_tokens(d) > room)
+    if oversized:
+        print(f"[WARN] Level {level}: {oversized} inputs > {room} tokens, truncated to fit the budget")
+        drafts = [truncate_to_tokens(d, room) for d in drafts]
+
+    total = overhead + joined_tokens(drafts)
+    if total <= budget:
+        print(f"   -> Level {level}: final consolidation of {len(drafts)} inputs (~{total} tokens)")
+        return consolidate_drafts(drafts)
+
+    # 지난 단계보다 줄지 않으면(통합 결과가 입력만큼 긺) 입력을 균등하게 잘라서 최종 통합.
+    # 입력이 너무 많아 몫이 MIN_INPUT_SHARE보다 작으면 그만큼만 남기고 한 단계 더 묶음 -> 입력 수가 매번 줄어듦
+    if prev_total is not None and total >= prev_total:
+        n = len(drafts)
+        share = (room - (n - 1) * estimate_tokens(DRAFT_SEPARATOR)) // n
+        if share >= MIN_INPUT_SHARE:
+            print(f"[WARN] Level {level}: ~{total} tokens did not shrink, truncating each input to {share} tokens")
+            drafts = [truncate_to_tokens(d, share) for d in drafts]
+            total = overhead + joined_tokens(drafts)
+            print(f"   -> Level {level}: final consolidation of {len(drafts)} inputs (~{total} tokens)")
+            return consolidate_drafts(drafts)
+        print(f"[WARN] Level {level}: ~{total} tokens did not shrink and {n} inputs are too many for one call, "
+              f"truncating each input to {MIN_INPUT_SHARE} tokens and merging again")
+        drafts = [truncate_to_tokens(d, MIN_INPUT_SHARE) for d in drafts]
+        total = overhead + joined_tokens(drafts)
+
+    # 묶음이 draft 하나뿐이어도(예산 절반 이상인 draft) 각각 통합해서 줄임
+    batches = batch_by_tokens(drafts, room, separator=DRAFT_SEPARATOR)
+    print(f"   -> Level {level}: {len(drafts)} inputs (~{total} tokens) -> {len(batches)} batches")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partials = list(pool.map(consolidate_drafts, batches))
+
+    partials = [f"--- Partial Guideline {i+1} ---\n{text}" for i, text in enumerate(partials)]
+    return consolidate_hierarchical(partials, budget, max_workers, level + 1, prev_total=total)
+
+def create_guideline(max_workers=LLM_MAX_CONCURRENCY):
+    cases = load_labeled_seeds()
     
     print(f"\n[Guideline Maker] Stage 2-1: Drafting (Simulating Appendix B.2)...")
+    print(f"   -> {len(cases)} labeled cases, {max_workers} concurrent requests")
     
     # 1. Drafting (Case-by-Case)
-    for i, fpath in enumerate(files):
-        with open(fpath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            
-        if data.get("expert_analysis"):
-            print(f"   -> Processing Case {i+1}...")
-            draft = create_draft_for_case(data)
-            if draft:
-                drafts.append(f"--- Draft {i+1} ---\n{draft}")
-            time.sleep(1) 
+    # 요청은 스레드 풀에서 동시에 보내되(속도는 TokenBucket으로 제한), 결과는 Seed 순서대로 모음
+    t0 = time.time()
+    cache = draft_cache()
+    hits_before = cache.hits if cache is not None else 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda case: create_draft_for_case(case[1]), cases))
+
+    drafts = [f"--- Draft {i+1} ---\n{draft}" for i, draft in enumerate(results) if draft]
+    print(f"   -> {len(drafts)}/{len(cases)} drafts in {time.time() - t0:.1f}s")
+    if cache is not None and cases:
+        hits = cache.hits - hits_before
+        print(f"   -> Draft cache: {hits}/{len(cases)} reused ({hits / len(cases):.0%} hit rate), "
+              f"{len(cases) - hits} LLM calls")
             
     if not drafts:
         print("[ERROR] 데이터 부족.")
@@ -116,20 +220,16 @@ def create_guideline():
 
     print(f"\n[Guideline Maker] Stage 2-2: Consolidating (Simulating Appendix B.2)...")
     
-    # 2. Consolidating
-    full_input = CONSOLIDATE_USER_TEMPLATE.format(drafts="\n".join(drafts))
-    
-    model = genai.GenerativeModel(MODEL_NAME, system_instruction=CONSOLIDATE_SYSTEM_PROMPT)
-    
+    # 2. Consolidating (토큰 예산을 넘으면 계층적 map-reduce)
     try:
-        response = model.generate_content(full_input)
-        guideline_text = response.text
+        guideline_text = consolidate_hierarchical(drafts, max_workers=max_workers)
         
         save_path = os.path.join(BASE_DIR, "guideline.md")
         with open(save_path, "w", encoding="utf-8") as f:
             f.write(guideline_text)
             
         print(f"[SUCCESS] Guideline Saved: {save_path}")
+        llm_client.print_latency_stats()
         return guideline_text
         
     except Exception as e:
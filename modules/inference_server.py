@@ -0,0 +1,207 @@
+import os
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+
+from config import INFERENCE_SERVER_ADDRESS, INFERENCE_SERVER_KEY_PATH
+
+
+def load_authkey(path=INFERENCE_SERVER_KEY_PATH):
+    """
+    서버/클라이언트 공용 인증 키. multiprocessing.connection은 pickle을 주고받으므로
+    키를 아는 로컬 프로세스는 서버에서 코드를 실행할 수 있음 -> 고정 키 대신 설치별 무작위 키 사용.
+    CLONE_INFERENCE_AUTHKEY 환경 변수가 있으면 그 값을 쓰고, 없으면 path(0600)에서 읽거나 새로 만듭니다.
+    """
+    env_key = os.getenv("CLONE_INFERENCE_AUTHKEY")
+    if env_key:
+        return env_key.encode()
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "rb") as f:
+            return f.read().strip()
+    key = secrets.token_hex(32).encode()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    print(f"[INFO] Generated inference server key: {path}")
+    return key
+
+
+# ---------------------------------------------------------
+# 1. Server (모델을 한 번만 로드해서 계속 띄워두는 데몬)
+# ---------------------------------------------------------
+
+class _PosePool:
+    """
+    MediaPipe Pose는 프레임 간 tracking 상태를 가지므로 클라이언트(세션)마다 별도 인스턴스를 씁니다.
+    한 번 만든 인스턴스는 연결이 끊기면 풀에 반납해 다음 세션이 재사용합니다.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.factory()
+
+    def release(self, pose):
+        with self._lock:
+            self._idle.append(pose)
+
+
+Landmark = namedtuple("Landmark", ["x", "y", "z", "visibility"])
+
+
+def _landmarks_to_list(pose_landmarks):
+    if pose_landmarks is None:
+        return None
+    return [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark]
+
+
+def _handle_client(conn, recorder, pose_pool, model_lock):
+    pose = pose_pool.acquire() if pose_pool else None
+    try:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except EOFError:
+                break
+
+            if op == "ping":
+                conn.send("pong")
+            elif op == "pose":
+                res = pose.process(payload) if pose else None
+                conn.send(_landmarks_to_list(res.pose_landmarks) if res else None)
+            elif op == "detect":
+                with model_lock:
+                    boxes, probs = recorder.mtcnn.detect(payload)
+                conn.send((boxes, probs))
+            elif op == "emotions":
+                with model_lock:
+                    labels, scores = recorder.rec.predict_emotions(payload, logits=False)
+                conn.send((labels, np.asarray(scores)))
+            else:
+                conn.send(None)
+    finally:
+        if pose is not None:
+            pose_pool.release(pose)
+        conn.close()
+
+
+def _warm_up(recorder, pose_pool):
+    """더미 프레임으로 한 번씩 추론해서 첫 요청의 지연(lazy init, 커널 컴파일 등)을 미리 치름"""
+    dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+    if pose_pool:
+        pose = pose_pool.acquire()
+        pose.process(dummy)
+        pose_pool.release(pose)
+    recorder.mtcnn.detect(dummy)
+    recorder.rec.predict_emotions([np.zeros((160, 160, 3), dtype=np.uint8)], logits=False)
+
+
+def serve(address=INFERENCE_SERVER_ADDRESS, authkey=None):
+    # 지연 import: 클라이언트 쪽(recorder)에서 이 모듈을 가져올 때는 모델 의존성이 필요 없음
+    from modules.recorder import BehaviorRecorder
+
+    t0 = time.time()
+    recorder = BehaviorRecorder(capture_only=False, use_server=False)
+
+    pose_pool = None
+    if recorder.pose:
+        pose_pool = _PosePool(lambda: recorder.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=1,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        ))
+        pose_pool.release(recorder.pose)
+
+    _warm_up(recorder, pose_pool)
+    print(f"[SERVER] Models loaded & warmed up in {time.time() - t0:.1f}s")
+
+    model_lock = threading.Lock()
+    with Listener(address, authkey=authkey or load_authkey()) as listener:
+        print(f"[SERVER] Inference server listening on {address[0]}:{address[1]} (Ctrl+C to stop)")
+        while True:
+            try:
+                conn = listener.accept()
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"[SERVER] Rejected connection: {e}")
+                continue
+            threading.Thread(target=_handle_client, args=(conn, recorder, pose_pool, model_lock),
+                             daemon=True).start()
+
+
+# ---------------------------------------------------------
+# 2. Client (BehaviorRecorder가 로컬 모델 대신 사용하는 어댑터)
+# ---------------------------------------------------------
+
+class InferenceClient:
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def request(self, op, payload=None):
+        with self._lock:
+            self.conn.send((op, payload))
+            return self.conn.recv()
+
+    def close(self):
+        self.conn.close()
+
+
+class RemotePose:
+    """mediapipe Pose.process()와 같은 형태로 결과(.pose_landmarks)를 돌려주는 어댑터"""
+    def __init__(self, client):
+        self.client = client
+
+    def process(self, frame_rgb):
+        # mediapipe(landmark_pb2)를 import하지 않도록 같은 속성(.landmark[i].x ...)을 갖는 가벼운 객체로 변환
+        points = self.client.request("pose", frame_rgb)
+        if points is None:
+            return SimpleNamespace(pose_landmarks=None)
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=[Landmark(*p) for p in points]))
+
+
+class RemoteMTCNN:
+    """facenet_pytorch MTCNN.detect()와 같은 (boxes, probs)를 돌려주는 어댑터"""
+    def __init__(self, client):
+        self.client = client
+
+    def detect(self, frame_rgb):
+        return self.client.request("detect", frame_rgb)
+
+
+class RemoteRecognizer:
+    """EmotiEffLibRecognizer.predict_emotions()와 같은 (labels, scores)를 돌려주는 어댑터"""
+    def __init__(self, client):
+        self.client = client
+
+    def predict_emotions(self, face_crops, logits=False):
+        return self.client.request("emotions", list(face_crops))
+
+
+def connect_inference_server(address=INFERENCE_SERVER_ADDRESS, authkey=None):
+    """실행 중인 추론 서버에 연결. 서버가 없으면 None (호출 측에서 로컬 모델 로드로 fallback)."""
+    try:
+        client = InferenceClient(Client(address, authkey=authkey or load_authkey()))
+        if client.request("ping") == "pong":
+            return client
+    except (OSError, EOFError, AuthenticationError) as e:
+        print(f"[INFO] Inference server not available ({e}). Loading models locally.")
+    return None
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,10 +1,31 @@
 import os
 import json
 import glob
-import google.generativeai as genai
-from config import GEMINI_API_KEY, SEED_DIR, BASE_DIR
+import time
+import asyncio
+import threading
+from datetime import datetime
+from config import (
+    SEED_DIR, BASE_DIR, CACHE_DIR, USE_LLM_CACHE, LLM_CACHE_MAX_MB,
+    LLM_MAX_CONCURRENCY, JUDGE_PROMPT_TOKEN_CAP
+)
+from modules import llm_client
+from modules.cache import DiskCache, content_key
+from modules.tokens import estimate_tokens, truncate_to_tokens
 
-genai.configure(api_key=GEMINI_API_KEY)
+# 판결 캐시: 세션 Seed 내용 + guideline.md + 모델이 같으면 이전 판결을 그대로 반환
+# (가이드라인을 다시 만들면 키가 바뀌므로 자동으로 무효화)
+_judge_cache = None
+_judge_cache_lock = threading.Lock()
+
+def judge_cache():
+    """판결 캐시 (data/cache/judgments.sqlite, 처음 쓸 때 생성). USE_LLM_CACHE=False면 None"""
+    global _judge_cache
+    with _judge_cache_lock:
+        if _judge_cache is None and USE_LLM_CACHE:
+            _judge_cache = DiskCache(os.path.join(CACHE_DIR, "judgments.sqlite"),
+                                     max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024)
+        return _judge_cache
 
 # [수정됨] 한국어 출력을 강제하는 시스템 프롬프트
 JUDGE_SYSTEM_PROMPT = """
@@ -35,10 +56,109 @@ def load_guideline():
             return f.read()
     return None
 
-def evaluate_session(session_id):
-    # 1. 해당 세션의 모든 선택지 데이터 로드
+# ---------------------------------------------------------
+# Compact Prompt Builder
+# ---------------------------------------------------------
+
+JUDGE_PROMPT_TEMPLATE = """### Reference Document (Guideline)
+{guideline}
+
+### Task
+Session {session_id}에서 사용자가 본 {n_options}개의 선택지를 비교 분석하십시오.
+가이드라인에 따라 사용자가 무의식적으로 가장 선호했을 선택지를 예측하고, 그 이유를 **한국어**로 설명하십시오.
+
+[Observed Options Data]
+{options}
+"""
+
+MIN_EMOTION_SHARE = 5.0  # emotion_full_stats에서 이 값(%) 미만인 감정은 생략
+
+def _round_floats(obj, digits=3):
+    if isinstance(obj, float):
+        return round(obj, digits)
+    if isinstance(obj, dict):
+        return {k: _round_floats(v, digits) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_round_floats(v, digits) for v in obj]
+    return obj
+
+def _run_length(labels):
+    """['Neutral', 'Neutral', 'Happiness'] -> 'Neutral*2>Happiness'"""
+    runs = []
+    for label in labels:
+        if runs and runs[-1][0] == label:
+            runs[-1][1] += 1
+        else:
+            runs.append([label, 1])
+    return ">".join(f"{label}*{n}" if n > 1 else label for label, n in runs)
+
+def compact_metrics(metrics, level=0):
+    """
+    판결에 쓰는 behavior_metrics만 남기고 압축.
+    level 0: fps 제거, 5% 미만 감정 생략, 초 단위 감정 궤적은 run-length 문자열로
+    level 1: 라벨 위주 (세부 감정 분포/수치/시계열 특징 제거)
+    """
+    m = dict(metrics)
+    m.pop("fps_mean", None)
+
+    if level >= 1:
+        keep = ("duration_sec", "dominant_emotion", "posture", "gesture", "gaze")
+        m = {k: m[k] for k in keep if k in m}
+        for key in ("posture", "gesture"):
+            if isinstance(m.get(key), dict):
+                m[key] = m[key].get("label")
+        if isinstance(m.get("gaze"), dict):
+            m["gaze"] = m["gaze"].get("label")
+        return _round_floats(m, 2)
+
+    stats = m.get("emotion_full_stats")
+    if isinstance(stats, dict):
+        m["emotion_full_stats"] = {k: v for k, v in stats.items() if v is not None and v >= MIN_EMOTION_SHARE}
+    trajectory = m.get("emotion_trajectory")
+    if isinstance(trajectory, dict) and "per_second" in trajectory:
+        m["emotion_trajectory"] = {"per_second": _run_length(trajectory["per_second"]),
+                                   "shifts": trajectory.get("shifts")}
+    return _round_floats(m, 3)
+
+def build_judge_prompt(session_id, session_data, guideline, cap=JUDGE_PROMPT_TOKEN_CAP):
+    """
+    들여쓰기 없는 JSON + 압축된 metrics로 판결 프롬프트를 만듭니다.
+    cap(추정 토큰)을 넘으면 metrics를 한 단계 더 압축하고, 그래도 넘으면 가이드라인 뒷부분을 자릅니다.
+    Returns: (prompt, 추정 토큰 수)
+    """
+    def render(level, guideline_text):
+        options = [{**option, "behavior_metrics": compact_metrics(option["behavior_metrics"], level)}
+                   for option in session_data]
+        return JUDGE_PROMPT_TEMPLATE.format(
+            guideline=guideline_text.strip(),
+            session_id=session_id,
+            n_options=len(session_data),
+            options=json.dumps(options, ensure_ascii=False, separators=(",", ":"))
+        )
+
+    for level in (0, 1):
+        prompt = render(level, guideline)
+        tokens = estimate_tokens(prompt) + estimate_tokens(JUDGE_SYSTEM_PROMPT)
+        if cap is None or tokens <= cap:
+            return prompt, tokens
+
+    # 데이터만으로도 cap에 가까우면 가이드라인 뒷부분을 잘라서 맞춤 (추정치 반올림 차이는 몇 토큰 더 잘라서 보정)
+    print(f"[WARN] Judge prompt ~{tokens} tokens > cap {cap}: guideline truncated")
+    keep = estimate_tokens(guideline) - (tokens - cap)
+    while True:
+        prompt = render(1, truncate_to_tokens(guideline, max(keep, 0)))
+        tokens = estimate_tokens(prompt) + estimate_tokens(JUDGE_SYSTEM_PROMPT)
+        if tokens <= cap or keep <= 0:
+            return prompt, tokens
+        keep -= tokens - cap
+
+def evaluate_session(session_id, use_cache=True):
+    # Seed 파일이 모두 만들어진 뒤에 호출해야 함: 백그라운드로 Seed를 생성하는 호출부(main.py)는
+    # 먼저 seed_worker.wait_for_session()으로 기다림 (judge는 preprocessor/pandas를 import 하지 않음)
+
+    # 1. 해당 세션의 모든 선택지 데이터 로드 (파일명 순서 -> 같은 데이터면 같은 프롬프트/캐시 키)
     pattern = os.path.join(SEED_DIR, f"seed_{session_id}_*.json")
-    files = glob.glob(pattern)
+    files = sorted(glob.glob(pattern))
     
     if not files:
         print(f"[Judge] Session ID {session_id}에 해당하는 데이터가 없습니다.")
@@ -62,28 +182,103 @@ def evaluate_session(session_id):
         print("[Judge] 가이드라인 파일(guideline.md)이 없습니다. stage2를 먼저 실행하세요.")
         return None
 
-    # 3. LLM 판결 요청
-    prompt = f"""
-    ### Reference Document (Guideline)
-    {guideline}
-    
-    ### Task
-    Session {session_id}에서 사용자가 본 {len(session_data)}개의 선택지를 비교 분석하십시오.
-    가이드라인에 따라 사용자가 무의식적으로 가장 선호했을 선택지를 예측하고, 그 이유를 **한국어**로 설명하십시오.
-    
-    [Observed Options Data]
-    {json.dumps(session_data, indent=2, ensure_ascii=False)}
-    """
-    
-    model = genai.GenerativeModel("gemini-2.5-flash", system_instruction=JUDGE_SYSTEM_PROMPT)
-    
+    # 3. 프롬프트 구성 (압축 직렬화 + 토큰 상한)
+    prompt, est_tokens = build_judge_prompt(session_id, session_data, guideline)
+
+    # 프롬프트에 세션 데이터와 가이드라인이 모두 들어 있으므로 프롬프트 자체를 캐시 키로 사용
+    cache = judge_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = content_key("judge", prompt, JUDGE_SYSTEM_PROMPT, llm_client.cache_scope())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"[Judge] Session {session_id}: 캐시된 판결을 사용합니다. (데이터/가이드라인 변경 없음)")
+            return cached
+
+    # 4. LLM 판결 요청
     try:
-        response = model.generate_content(
-            prompt, 
-            generation_config={"response_mime_type": "application/json"}
+        response = llm_client.generate(
+            "judge", prompt, system_instruction=JUDGE_SYSTEM_PROMPT,
+            generation_config={"response_mime_type": "application/json"}, label=f"Judge {session_id}"
         )
+        actual = response.prompt_tokens
+        print(f"[Judge] Session {session_id}: prompt ~{est_tokens} tokens (estimated)"
+              + (f", {actual} tokens (actual)" if actual else "") + f", {response.latency:.1f}s")
         result = json.loads(response.text)
+        if cache_key is not None:
+            cache.set(cache_key, result)
         return result
     except Exception as e:
         print(f"[Judge Error] {e}")
-        return None
\ No newline at end of file
+        return None
+
+# ---------------------------------------------------------
+# Batch Mode (여러 세션을 동시에 판결 -> JSONL)
+# ---------------------------------------------------------
+
+def load_judged_sessions(out_path):
+    """이미 성공적으로 판결되어 JSONL에 기록된 세션 ID (재실행 시 건너뜀)"""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 중단된 실행에서 마지막 줄이 잘린 경우
+            if record.get("status") == "ok":
+                done.add(record["session_id"])
+    return done
+
+async def _judge_batch(session_ids, out_path, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"ok": 0, "failed": 0}
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        async def judge_one(session_id):
+            async with semaphore:
+                t0 = time.perf_counter()
+                # evaluate_session은 blocking 호출 -> 스레드에서 실행 (속도 제한/재시도는 내부에서)
+                result = await asyncio.to_thread(evaluate_session, session_id)
+                seconds = time.perf_counter() - t0
+
+            status = "ok" if result else "failed"
+            counts[status] += 1
+            record = {
+                "session_id": session_id,
+                "status": status,
+                "judged_at": datetime.now().isoformat(timespec="seconds"),
+                "seconds": round(seconds, 2),
+                "result": result
+            }
+            # 끝나는 순서대로 바로 기록 (중간에 멈춰도 완료된 세션은 남음)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"[Batch] {session_id}: {status} ({seconds:.1f}s) "
+                  f"[{counts['ok'] + counts['failed']}/{len(session_ids)}]")
+
+        await asyncio.gather(*(judge_one(sid) for sid in session_ids))
+    return counts
+
+def judge_sessions_batch(session_ids, out_path, concurrency=LLM_MAX_CONCURRENCY, resume=True):
+    """
+    세션 목록을 최대 concurrency개씩 동시에 판결하고 결과를 JSONL로 스트리밍합니다.
+    resume=True면 out_path에 이미 성공으로 기록된 세션은 건너뜁니다.
+    """
+    if load_guideline() is None:
+        print("[Judge] 가이드라인 파일(guideline.md)이 없습니다. stage2를 먼저 실행하세요.")
+        return None
+
+    done = load_judged_sessions(out_path) if resume else set()
+    todo = [sid for sid in session_ids if sid not in done]
+    print(f"[Batch] {len(session_ids)} sessions, {len(session_ids) - len(todo)} already judged, "
+          f"{len(todo)} to judge (concurrency {concurrency}) -> {out_path}")
+    if not todo:
+        return {"ok": 0, "failed": 0}
+
+    t0 = time.perf_counter()
+    counts = asyncio.run(_judge_batch(todo, out_path, concurrency))
+    print(f"[Batch] Done in {time.perf_counter() - t0:.1f}s: {counts['ok']} ok, {counts['failed']} failed")
+    llm_client.print_latency_stats()
+    return counts
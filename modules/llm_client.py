@@ -0,0 +1,274 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+
+from config import (
+    GEMINI_API_KEY, GEMINI_API_ENDPOINT, GEMINI_MODEL_NAME, LLM_BACKEND, LLM_TIMEOUT_SEC,
+    LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_MAX_RETRIES, FAKE_LLM_LATENCY
+)
+from modules.rate_limit import TokenBucket, call_with_retry
+
+# 모든 Stage(stimulus / guideline_maker / judge)가 같이 쓰는 LLM 호출 계층.
+#   - backend: "gemini"(실제 API) 또는 "fake"(네트워크 없이 task별로 결정적인 응답)
+#   - 모델 객체는 (모델, system prompt)별로 한 번만 만들어 재사용
+#   - 요청 속도 제한(TokenBucket, 실제 API만)과 재시도/timeout을 한 곳에서 적용하고, task별 지연시간을 기록
+#   LLM_BACKEND=fake python stage3_inference.py --batch   (오프라인 부하 테스트)
+
+
+class LLMResponse:
+    """backend와 상관없이 같은 형태의 응답 (text + 토큰 수 + 지연시간)"""
+    def __init__(self, text, prompt_tokens=None, output_tokens=None, latency=0.0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.latency = latency
+
+
+# ---------------------------------------------------------
+# 1. Backends
+# ---------------------------------------------------------
+
+class GeminiBackend:
+    name = "gemini"
+    rate_limited = True  # 실제 API 할당량 -> 공유 TokenBucket 적용
+
+    def __init__(self):
+        import google.generativeai as genai
+        if GEMINI_API_ENDPOINT:
+            # 로컬 가짜 엔드포인트(modules/fake_llm_server.py) 등으로 요청을 보낼 때
+            genai.configure(api_key=GEMINI_API_KEY, transport="rest",
+                            client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        else:
+            genai.configure(api_key=GEMINI_API_KEY)
+        self._genai = genai
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name, system_instruction):
+        key = (model_name, system_instruction)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._genai.GenerativeModel(model_name, system_instruction=system_instruction)
+            return self._models[key]
+
+    def generate(self, task, prompt, system_instruction, model_name, generation_config, timeout):
+        model = self._model(model_name, system_instruction)
+        response = model.generate_content(prompt, generation_config=generation_config,
+                                          request_options={"timeout": timeout})
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(response.text,
+                           prompt_tokens=getattr(usage, "prompt_token_count", None) if usage else None,
+                           output_tokens=getattr(usage, "candidates_token_count", None) if usage else None)
+
+    def stream(self, task, prompt, system_instruction, model_name, generation_config, timeout):
+        # stream=True: 첫 chunk까지 받아온 상태로 반환되므로 연결/429 오류는 여기서 바로 올라옴
+        model = self._model(model_name, system_instruction)
+        response = model.generate_content(prompt, generation_config=generation_config, stream=True,
+                                          request_options={"timeout": timeout})
+        return (chunk.text for chunk in response)
+
+
+class FakeBackend:
+    """
+    네트워크 없이 동작하는 결정적 backend. 같은 (task, prompt)에는 항상 같은 응답을 돌려주고,
+    stimulus/judge는 실제 호출부가 파싱할 수 있는 JSON 형식으로 응답합니다.
+    """
+    name = "fake"
+    rate_limited = False  # 할당량이 없으므로 파이프라인 처리량을 그대로 측정할 수 있게 속도 제한 안 함
+
+    def __init__(self, latency=FAKE_LLM_LATENCY):
+        self.latency = latency
+
+    @staticmethod
+    def _digest(task, prompt):
+        return hashlib.sha256(f"{task}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def _stimulus(self, prompt):
+        block = prompt.split("[Options to Analyze]", 1)[-1]
+        texts = re.findall(r"^\s*\d+\.\s*(.+?)\s*$", block, flags=re.MULTILINE)
+        return json.dumps({"options": [{
+            "id": f"opt{i+1}",
+            "original_text": text,
+            "title": text[:20],
+            "summary": f"[fake] {text}",
+            "buying_point": f"[fake] {text}",
+            "pros": ["[fake] 장점"],
+            "cons": ["[fake] 단점"]
+        } for i, text in enumerate(texts)]}, ensure_ascii=False)
+
+    def _judge(self, prompt, digest):
+        titles = [json.loads(f'"{t}"') for t in re.findall(r'"option_title":\s*"((?:[^"\\]|\\.)*)"', prompt)]
+        winner = titles[int(digest, 16) % len(titles)] if titles else ""
+        return json.dumps({
+            "analysis_per_option": {title: "[fake] 가이드라인 기반 분석" for title in titles},
+            "final_recommendation": winner,
+            "winning_reason": f"[fake {digest[:12]}] 결정적 가짜 판결"
+        }, ensure_ascii=False)
+
+    def _text(self, task, prompt):
+        digest = self._digest(task, prompt)
+        if task == "stimulus":
+            return self._stimulus(prompt)
+        if task == "judge":
+            return self._judge(prompt, digest)
+        return f"[fake-llm {digest[:12]}] Step 1: Evaluate posture. Step 2: Check gaze. Step 3: Weigh emotions."
+
+    def generate(self, task, prompt, system_instruction, model_name, generation_config, timeout):
+        if self.latency:
+            time.sleep(self.latency)
+        text = self._text(task, prompt)
+        return LLMResponse(text, prompt_tokens=len(prompt) // 4, output_tokens=len(text) // 4)
+
+    def stream(self, task, prompt, system_instruction, model_name, generation_config, timeout, chunk_size=64):
+        """같은 응답을 chunk_size 글자씩 나눠 보내고, latency는 chunk들에 고르게 나눠 씀"""
+        text = self._text(task, prompt)
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+
+        def chunk_iter():
+            for chunk in chunks:
+                if self.latency:
+                    time.sleep(self.latency / len(chunks))
+                yield chunk
+        return chunk_iter()
+
+
+BACKENDS = {"gemini": GeminiBackend, "fake": FakeBackend}
+
+# ---------------------------------------------------------
+# 2. Latency Metrics
+# ---------------------------------------------------------
+
+class LatencyStats:
+    """task별 호출 수 / 실패 수 / 지연시간(초) 기록 (스레드 안전)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)
+        self._errors = defaultdict(int)
+
+    def record(self, task, seconds, ok=True):
+        with self._lock:
+            if ok:
+                self._samples[task].append(seconds)
+            else:
+                self._errors[task] += 1
+
+    def summary(self):
+        with self._lock:
+            tasks = sorted(set(self._samples) | set(self._errors))
+            report = {}
+            for task in tasks:
+                samples = sorted(self._samples[task])
+                n = len(samples)
+                report[task] = {
+                    "calls": n,
+                    "errors": self._errors[task],
+                    "mean": sum(samples) / n if n else None,
+                    "p50": samples[n // 2] if n else None,
+                    "p95": samples[min(n - 1, int(n * 0.95))] if n else None,
+                    "max": samples[-1] if n else None
+                }
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._errors.clear()
+
+
+# ---------------------------------------------------------
+# 3. Shared Client
+# ---------------------------------------------------------
+
+_backend = None
+_backend_lock = threading.Lock()
+_limiter = TokenBucket.per_minute(LLM_REQUESTS_PER_MINUTE, burst=LLM_MAX_CONCURRENCY)
+stats = LatencyStats()
+
+
+def get_backend():
+    """config.LLM_BACKEND의 backend를 처음 호출할 때 한 번만 만듦 (genai.configure도 한 번)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if LLM_BACKEND not in BACKENDS:
+                raise ValueError(f"Unknown LLM_BACKEND: {LLM_BACKEND} (choose from {sorted(BACKENDS)})")
+            _backend = BACKENDS[LLM_BACKEND]()
+            print(f"[INFO] LLM backend: {_backend.name} ({GEMINI_MODEL_NAME})")
+        return _backend
+
+
+def set_backend(backend):
+    """backend 교체 (예: set_backend(FakeBackend(latency=0.2)))"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _limiter_for(backend):
+    return _limiter if getattr(backend, "rate_limited", True) else None
+
+
+def cache_scope(model_name=GEMINI_MODEL_NAME):
+    """
+    LLM 응답 캐시 키에 넣을 backend 식별자 (backend 이름 + 엔드포인트 + 모델).
+    fake backend나 가짜 엔드포인트의 응답이 실제 API 실행에서 캐시 hit로 재사용되지 않도록 합니다.
+    """
+    with _backend_lock:
+        name = _backend.name if _backend is not None else LLM_BACKEND
+    endpoint = GEMINI_API_ENDPOINT if name == "gemini" else None
+    return {"backend": name, "endpoint": endpoint, "model": model_name}
+
+
+def generate(task, prompt, system_instruction=None, generation_config=None,
+             model_name=GEMINI_MODEL_NAME, timeout=LLM_TIMEOUT_SEC, retries=LLM_MAX_RETRIES, label=None):
+    """
+    공유 속도 제한 + 재시도 + timeout을 적용해 한 번 생성합니다. 마지막 시도도 실패하면 예외를 올립니다.
+    task: "stimulus" / "draft" / "consolidate" / "judge" 등 (지연시간 집계와 fake 응답 형식에 사용)
+    """
+    backend = get_backend()
+
+    def attempt():
+        t0 = time.perf_counter()
+        try:
+            response = backend.generate(task, prompt, system_instruction, model_name, generation_config, timeout)
+        except Exception:
+            stats.record(task, time.perf_counter() - t0, ok=False)
+            raise
+        response.latency = time.perf_counter() - t0
+        stats.record(task, response.latency)
+        return response
+
+    return call_with_retry(attempt, limiter=_limiter_for(backend), retries=retries, label=label or task)
+
+
+def stream(task, prompt, system_instruction=None, generation_config=None,
+           model_name=GEMINI_MODEL_NAME, timeout=LLM_TIMEOUT_SEC, retries=LLM_MAX_RETRIES, label=None):
+    """
+    응답 텍스트를 chunk 단위로 yield하는 generator. 요청 시작(첫 chunk 전)까지만 재시도하고,
+    스트리밍 도중 끊기면 예외를 그대로 올립니다. 지연시간은 마지막 chunk까지의 시간으로 기록.
+    """
+    backend = get_backend()
+    t0 = time.perf_counter()
+    try:
+        chunks = call_with_retry(
+            lambda: backend.stream(task, prompt, system_instruction, model_name, generation_config, timeout),
+            limiter=_limiter_for(backend), retries=retries, label=label or task
+        )
+        for chunk in chunks:
+            yield chunk
+    except Exception:
+        stats.record(task, time.perf_counter() - t0, ok=False)
+        raise
+    stats.record(task, time.perf_counter() - t0)
+
+
+def print_latency_stats():
+    for task, s in stats.summary().items():
+        if s["calls"]:
+            print(f"[LLM] {task}: {s['calls']} calls, {s['errors']} errors, "
+                  f"mean {s['mean']:.2f}s, p50 {s['p50']:.2f}s, p95 {s['p95']:.2f}s, max {s['max']:.2f}s")
+        else:
+            print(f"[LLM] {task}: 0 calls, {s['errors']} errors")
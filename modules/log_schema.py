@@ -0,0 +1,127 @@
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+# pd.read_csv engine="pyarrow": 멀티스레드 CSV 파서 (pyarrow는 pandas가 직접 import하므로 설치 여부만 확인)
+CSV_ENGINE = "pyarrow" if find_spec("pyarrow") is not None else "c"
+
+# MediaPipe Pose 33개 landmark (인덱스 순서)
+POSE_LANDMARKS = [
+    "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner", "right_eye", "right_eye_outer",
+    "left_ear", "right_ear", "mouth_left", "mouth_right", "left_shoulder", "right_shoulder",
+    "left_elbow", "right_elbow", "left_wrist", "right_wrist", "left_pinky", "right_pinky",
+    "left_index", "right_index", "left_thumb", "right_thumb", "left_hip", "right_hip",
+    "left_knee", "right_knee", "left_ankle", "right_ankle", "left_heel", "right_heel",
+    "left_foot_index", "right_foot_index"
+]
+LANDMARK_INDEX = {name: i for i, name in enumerate(POSE_LANDMARKS)}
+LANDMARK_FIELDS = ("x", "y", "z", "vis")
+
+EMOTION_LABELS = ["Anger", "Contempt", "Disgust", "Fear", "Happiness", "Neutral", "Sadness", "Surprise"]
+MISSING_VALUE = -999  # 녹화기가 미검출 값에 쓰는 sentinel
+
+# 로그 스키마 (컬럼 구성으로 판별)
+#   wide   : 예전 emotion_log_*.csv (top_prob + 33개 landmark x/y/z/vis 전체)
+#   narrow : 현재 녹화기 로그 (nose x/y/vis + 양쪽 어깨 z/vis)
+#   legacy : 초기 녹화기 로그 (nose x/y + 왼쪽 어깨 z/vis만)
+SCHEMA_WIDE, SCHEMA_NARROW, SCHEMA_LEGACY = "wide", "narrow", "legacy"
+
+
+def detect_schema(columns):
+    columns = set(columns)
+    if "nose_x" not in columns or "left_shoulder_z" not in columns:
+        return None
+    if "left_eye_x" in columns and "left_hip_x" in columns:
+        return SCHEMA_WIDE
+    if "nose_vis" in columns:
+        return SCHEMA_NARROW
+    return SCHEMA_LEGACY
+
+
+class FrameLog:
+    """
+    스키마와 상관없이 같은 형태로 정규화된 프레임 로그.
+    landmarks: (frames, 33, 4) float32 [x, y, z, visibility], 로그에 없는 값은 NaN
+    emotions : (frames, 8) float32 감정 확률 (%), 감정 분석을 안 한 프레임은 NaN
+    """
+    def __init__(self, t, fps, landmarks, emotions, quality_level=None, schema=None):
+        self.t = t
+        self.fps = fps
+        self.landmarks = landmarks
+        self.emotions = emotions
+        self.quality_level = quality_level
+        self.schema = schema
+
+    def __len__(self):
+        return len(self.t)
+
+    def landmark(self, name, field):
+        return self.landmarks[:, LANDMARK_INDEX[name], LANDMARK_FIELDS.index(field)]
+
+    def to_dataframe(self):
+        """preprocessor 특징 함수가 쓰는 컬럼(FEATURE_COLUMNS) 형태의 DataFrame"""
+        data = {"t": self.t, "fps": self.fps}
+        for k, label in enumerate(EMOTION_LABELS):
+            data[f"prob_{label}"] = self.emotions[:, k]
+        for name, field in [("nose", "x"), ("nose", "y"), ("nose", "vis"),
+                            ("left_shoulder", "z"), ("left_shoulder", "vis"),
+                            ("right_shoulder", "z"), ("right_shoulder", "vis")]:
+            data[f"{name}_{field}"] = self.landmark(name, field)
+        if self.quality_level is not None:
+            data["quality_level"] = self.quality_level
+        return pd.DataFrame(data)
+
+
+def _read_columns(path, usecols):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=usecols).astype(np.float32).replace(MISSING_VALUE, np.nan)
+    return pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={c: np.float32 for c in usecols},
+        na_values=[str(MISSING_VALUE), f"{MISSING_VALUE}.0"],
+        engine=CSV_ENGINE
+    )
+
+
+def _read_header(path):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def load_log(path, landmarks=None):
+    """
+    CSV / Parquet 로그의 스키마를 판별해 FrameLog로 읽습니다.
+    landmarks: 읽을 landmark 이름 목록 (None이면 로그에 있는 33개 전부). 필요한 컬럼만 float32로 파싱.
+    """
+    header = _read_header(path)
+    schema = detect_schema(header)
+    if schema is None:
+        raise ValueError(f"Unknown log schema (no nose/shoulder columns): {path}")
+
+    available = set(header)
+    wanted = POSE_LANDMARKS if landmarks is None else landmarks
+    pose_cols = [(name, j, f"{name}_{field}") for name in wanted for j, field in enumerate(LANDMARK_FIELDS)
+                 if f"{name}_{field}" in available]
+    emotion_cols = [f"prob_{label}" for label in EMOTION_LABELS]
+    base_cols = [c for c in ["t", "fps"] + emotion_cols + ["quality_level"] if c in available]
+    df = _read_columns(path, base_cols + [col for _, _, col in pose_cols])
+
+    n = len(df)
+    pose = np.full((n, len(POSE_LANDMARKS), len(LANDMARK_FIELDS)), np.nan, dtype=np.float32)
+    for name, j, col in pose_cols:
+        pose[:, LANDMARK_INDEX[name], j] = df[col].to_numpy()
+
+    emotions = np.full((n, len(EMOTION_LABELS)), np.nan, dtype=np.float32)
+    for k, col in enumerate(emotion_cols):
+        if col in df.columns:
+            emotions[:, k] = df[col].to_numpy()
+
+    def column(name):
+        return df[name].to_numpy() if name in df.columns else np.full(n, np.nan, dtype=np.float32)
+
+    quality = df["quality_level"].to_numpy() if "quality_level" in df.columns else None
+    return FrameLog(column("t"), column("fps"), pose, emotions, quality_level=quality, schema=schema)
@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 로그는 선택 기능 (pyarrow 미설치 시 CSV만 저장)
+    pa = None
+    pq = None
+
+
+class FrameLogWriter:
+    """
+    프레임 로그를 메모리에 쌓아두지 않고, chunk 단위로 백그라운드 스레드에서 바로 파일에 이어 씁니다.
+    중간에 종료/크래시가 나도 이미 쓴 chunk는 디스크에 남으며, close()에서 fsync 합니다.
+    fmt="parquet"이면 CSV와 함께 float32 컬럼형 Parquet 파일도 기록합니다 (row group은 최소 row_group_size행).
+    writer 스레드가 밀리면 max_queue개 chunk에서 호출 스레드가 기다리고, 쓰기 오류가 나면 이후 행은 받지 않습니다.
+    """
+    def __init__(self, csv_path, fieldnames, fmt="csv", chunk_size=64, string_fields=("top_emotion",), timer=None,
+                 max_queue=16, row_group_size=1024):
+        self.csv_path = csv_path
+        self.timer = timer  # StageTimer (chunk 쓰기 지연 측정)
+        self.fieldnames = list(fieldnames)
+        self.string_fields = set(string_fields)
+        self.chunk_size = chunk_size
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self.rows_dropped = 0  # 쓰기 오류 이후 버린 행 수
+
+        self.parquet_path = None
+        if fmt == "parquet":
+            if pq is None:
+                print("[WARN] pyarrow가 없어 Parquet 로그를 건너뛰고 CSV만 저장합니다.")
+            else:
+                self.parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+
+        self._pending = []
+        self._pending_rows = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="FrameLogWriter", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self):
+        """전처리기가 읽을 대표 로그 경로 (Parquet가 있으면 Parquet)"""
+        return self.parquet_path or self.csv_path
+
+    def write_frames(self, frames):
+        """FrameBuffer.to_dataframe()으로 받은 행 블록을 추가. chunk_size만큼 모이면 writer 스레드로 넘김."""
+        if len(frames) == 0:
+            return
+        if self._error is not None:
+            self.rows_dropped += len(frames)
+            return
+        self._pending.append(frames)
+        self._pending_rows += len(frames)
+        if self._pending_rows >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """호출 스레드에 모인 행들을 writer 스레드로 넘깁니다."""
+        if self._pending:
+            chunk = pd.concat(self._pending, ignore_index=True)
+            self._pending = []
+            self._pending_rows = 0
+            if not self._put(chunk):
+                self.rows_dropped += len(chunk)
+
+    def _put(self, item):
+        """큐가 가득 차면 기다리되, writer 스레드가 오류로 멈췄으면 포기 (False)"""
+        while self._error is None:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def close(self):
+        """남은 chunk를 모두 쓰고 fsync 후 종료. 기록된 행 수를 반환."""
+        self.flush()
+        self._put(None)
+        self._thread.join()
+        if self._error is not None:
+            print(f"[ERR] Frame log write failed: {self._error} ({self.rows_dropped} rows not written)")
+        return self.rows_written
+
+    def _parquet_schema(self):
+        return pa.schema([
+            (name, pa.string() if name in self.string_fields else pa.float32())
+            for name in self.fieldnames
+        ])
+
+    def _parquet_table(self, chunk, schema):
+        columns = {}
+        for name in self.fieldnames:
+            if name in self.string_fields:
+                columns[name] = pa.array(chunk[name].to_numpy(), type=pa.string())
+            else:
+                columns[name] = pa.array(chunk[name].to_numpy(dtype=np.float32), type=pa.float32())
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    def _run(self):
+        pq_writer = None
+        schema = None
+        tables, table_rows = [], 0  # row group 하나로 모으는 중인 Parquet chunk
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+            pd.DataFrame(columns=self.fieldnames).to_csv(f, index=False)  # header
+            try:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is None:
+                        break
+                    t0 = time.perf_counter()
+                    chunk[self.fieldnames].to_csv(f, header=False, index=False)
+                    f.flush()
+
+                    if self.parquet_path:
+                        if pq_writer is None:
+                            schema = self._parquet_schema()
+                            pq_writer = pq.ParquetWriter(self.parquet_path, schema)
+                        tables.append(self._parquet_table(chunk, schema))
+                        table_rows += len(chunk)
+                        if table_rows >= self.row_group_size:
+                            pq_writer.write_table(pa.concat_tables(tables), row_group_size=table_rows)
+                            tables, table_rows = [], 0
+
+                    self.rows_written += len(chunk)
+                    if self.timer is not None:
+                        self.timer.record("log_write", time.perf_counter() - t0)
+                if tables:
+                    pq_writer.write_table(pa.concat_tables(tables), row_group_size=table_rows)
+            except Exception as e:
+                self._error = e
+                print(f"[ERR] Frame log write failed, no more rows will be written: {e}")
+            finally:
+                f.flush()
+                os.fsync(f.fileno())
+                if pq_writer is not None:
+                    pq_writer.close()
@@ -0,0 +1,116 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+import pandas as pd
+
+from config import LOG_DIR, LOG_FORMAT
+from modules.log_writer import FrameLogWriter
+from modules.profiler import StageTimer
+
+
+def load_frame_timestamps(video_path, timestamps_path=None):
+    """
+    VideoSink가 영상 옆에 남긴 {영상이름}_frames.csv 에서 프레임별 타임스탬프(t)를 읽습니다.
+    사이드카가 없는 일반 영상이면 None (영상의 명목 fps로 계산).
+    """
+    if timestamps_path is None:
+        timestamps_path = os.path.splitext(video_path)[0] + "_frames.csv"
+    if not os.path.exists(timestamps_path):
+        return None
+    return pd.read_csv(timestamps_path)["t"].to_numpy()
+
+
+def _decode_frames(cap, out_q):
+    """[디코딩 스레드] 영상 프레임을 빠짐없이 읽어 큐에 넣습니다 (라이브와 달리 드롭 없음)."""
+    idx = 0
+    while True:
+        ret, image = cap.read()
+        if not ret:
+            break
+        out_q.put((idx, image))
+        idx += 1
+    out_q.put(None)
+
+
+def analyze_video(video_path, recorder=None, out_csv=None, timestamps_path=None):
+    """
+    저장된 영상(Capture-only 모드 녹화 또는 임의의 영상 파일)을 headless로 끝까지 분석해
+    record_session과 동일한 스키마의 CSV 로그를 생성합니다.
+    모든 프레임을 분석하므로 샘플링 레이트는 라이브 세션의 CPU 속도와 무관합니다.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"[ERROR] Cannot open video: {video_path}")
+        return None
+
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    timestamps = load_frame_timestamps(video_path, timestamps_path)
+
+    if recorder is None:
+        # 지연 import: 모델 로딩이 필요한 시점에만 torch/mediapipe를 불러옴
+        from modules.recorder import BehaviorRecorder
+        recorder = BehaviorRecorder(capture_only=False)
+
+    if out_csv is None:
+        base_name = os.path.splitext(os.path.basename(video_path))[0]
+        out_csv = os.path.join(LOG_DIR, f"{base_name}.csv")
+
+    frames = queue.Queue(maxsize=64)
+    decoder = threading.Thread(target=_decode_frames, args=(cap, frames), name="VideoDecoder", daemon=True)
+    decoder.start()
+
+    buffer = recorder.new_frame_buffer()
+    recorder.timer = StageTimer()
+    wall_start = time.time()
+    recorder.face_tracker.reset()
+
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        idx, image = item
+
+        if timestamps is not None and idx < len(timestamps):
+            t = float(timestamps[idx])
+        else:
+            t = idx / video_fps
+
+        frame_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        pose_landmarks, face_crop = recorder.analyze_frame(frame_rgb)
+
+        # 원본 타임라인 기준 샘플링 레이트 (모든 프레임 분석 -> 캡처 fps와 동일)
+        fps = 1.0 / (0.001 + (t / (len(buffer) + 1)))
+        i = recorder.record_frame(buffer, t, fps, fps, pose_landmarks)
+        if face_crop is not None:
+            recorder.apply_emotions(buffer, recorder.emotion_batcher.submit(face_crop, i))
+
+    recorder.apply_emotions(buffer, recorder.emotion_batcher.flush())
+    decoder.join()
+    cap.release()
+
+    wall = time.time() - wall_start
+    frames_df = buffer.to_dataframe()
+    duration = float(frames_df["t"].iloc[-1]) if len(frames_df) else 0.0
+    print(f"[OFFLINE] {os.path.basename(video_path)}: {len(frames_df)} frames in {wall:.1f}s "
+          f"({len(frames_df) / (wall + 0.001):.1f} fps, {duration / (wall + 0.001):.2f}x real-time)")
+
+    if not len(frames_df):
+        return None
+    writer = FrameLogWriter(out_csv, recorder.csv_fieldnames, fmt=LOG_FORMAT, timer=recorder.timer)
+    writer.write_frames(frames_df)
+    writer.close()
+    print(f"[SAVE] Log saved to {writer.path}")
+
+    recorder.timer.write_sidecar(os.path.splitext(out_csv)[0] + "_timing.json", extra={
+        "source_video": os.path.basename(video_path),
+        "frames": len(frames_df),
+        "duration_sec": round(duration, 3),
+        "wall_sec": round(wall, 3),
+        "analysis_fps": round(len(frames_df) / (wall + 0.001), 2)
+    })
+
+    recorder.last_frames = frames_df
+    return writer.path
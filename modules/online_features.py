@@ -0,0 +1,203 @@
+import math
+from collections import deque
+
+from modules.preprocessor import (
+    EMOTION_COLUMNS, MISSING_VALUE,
+    classify_head_gesture, classify_posture, classify_gaze
+)
+
+
+class RunningStats:
+    """Welford 알고리즘: 값을 한 번씩만 보고 평균/표본분산(ddof=1)을 갱신"""
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x, count=1):
+        for _ in range(count):
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self._m2 += delta * (x - self.mean)
+
+    @property
+    def var(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class RunningMean:
+    """NaN을 건너뛰는 합/개수 (pandas mean(skipna=True)와 같은 의미)"""
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, x):
+        if not math.isnan(x):
+            self.total += x
+            self.count += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+
+class RollingMeanStats:
+    """
+    window 크기 rolling mean(앞부분은 bfill) 시퀀스의 분산을 온라인으로 계산.
+    첫 window-1개 값은 첫 번째 완성된 window 평균으로 채워지므로, 그 평균을 window번 반영합니다.
+    """
+    def __init__(self, window=5):
+        self.window = deque(maxlen=window)
+        self.stats = RunningStats()
+
+    def add(self, x):
+        self.window.append(x)
+        if len(self.window) < self.window.maxlen:
+            return
+        mean = sum(self.window) / len(self.window)
+        self.stats.add(mean, count=len(self.window) if self.stats.n == 0 else 1)
+
+
+class PrefixMeans:
+    """
+    누적합(prefix sum)으로 시퀀스 길이 n을 모른 채 기록하고,
+    끝난 뒤 [:int(n*a)] / [int(n*b):] 구간 평균을 O(1)로 계산합니다.
+    """
+    def __init__(self):
+        self.sums = [0.0]
+        self.counts = [0]
+
+    def add(self, x):
+        valid = not math.isnan(x)
+        self.sums.append(self.sums[-1] + (x if valid else 0.0))
+        self.counts.append(self.counts[-1] + valid)
+
+    def range_mean(self, start, stop):
+        count = self.counts[stop] - self.counts[start]
+        return (self.sums[stop] - self.sums[start]) / count if count else math.nan
+
+
+def _nanmean(values):
+    values = [v for v in values if not math.isnan(v)]
+    return sum(values) / len(values) if values else math.nan
+
+
+class OnlineBehaviorFeatures:
+    """
+    녹화 중 프레임이 확정될 때마다 한 번씩 갱신되는 특징 추출기.
+    modules/preprocessor.py의 배치 경로(compute_behavior_metrics)와 같은 규칙/임계값을 쓰며,
+    metrics()가 같은 구조의 결과를 반환하므로 Space를 누르는 즉시 Seed를 만들 수 있습니다.
+    """
+    def __init__(self, col, window=5):
+        self.col = col  # FrameBuffer.col (컬럼명 -> 인덱스)
+        self.emotion_idx = [col[c] for c in EMOTION_COLUMNS]
+        self.n = 0
+
+        self.t_max = -math.inf
+        self.fps = RunningMean()
+        self.emotions = [RunningMean() for _ in EMOTION_COLUMNS]
+        self.quality = RunningMean()
+        self.quality_max = -math.inf
+        self.degraded = 0
+
+        # 아래는 Pose가 검출된 프레임(nose_x 유효)만
+        self.n_vis = 0
+        self.nose_vis = RunningMean()
+        self.shoulder_vis = RunningMean()
+        self.nose_x = RunningStats()
+        self.nose_y = RunningStats()
+        self.rolling_x = RollingMeanStats(window)
+        self.rolling_y = RollingMeanStats(window)
+        self.left_z = PrefixMeans()
+        self.right_z = PrefixMeans()
+
+    def _value(self, row, name):
+        x = float(row[self.col[name]])
+        return math.nan if x == MISSING_VALUE else x
+
+    def add(self, row):
+        """FrameBuffer.values의 한 행(확정된 프레임)을 반영"""
+        self.n += 1
+        self.t_max = max(self.t_max, self._value(row, "t"))
+        self.fps.add(self._value(row, "fps"))
+        for stat, i in zip(self.emotions, self.emotion_idx):
+            x = float(row[i])
+            stat.add(math.nan if x == MISSING_VALUE else x)
+
+        level = self._value(row, "quality_level")
+        self.quality.add(level)
+        self.quality_max = max(self.quality_max, level)
+        self.degraded += level > 0
+
+        nose_x = self._value(row, "nose_x")
+        if math.isnan(nose_x):
+            return
+        nose_y = self._value(row, "nose_y")
+        self.n_vis += 1
+        self.nose_vis.add(self._value(row, "nose_vis"))
+        self.shoulder_vis.add(self._value(row, "left_shoulder_vis"))
+        self.nose_x.add(nose_x)
+        self.nose_y.add(nose_y)
+        self.rolling_x.add(nose_x)
+        self.rolling_y.add(nose_y)
+        self.left_z.add(self._value(row, "left_shoulder_z"))
+        self.right_z.add(self._value(row, "right_shoulder_z"))
+
+    def update_from_buffer(self, buffer, start, stop):
+        for i in range(start, stop):
+            self.add(buffer.values[i])
+
+    def _gesture(self):
+        # 가시성 값이 하나도 없으면(mean NaN) 보이지 않는 것으로 취급 (배치 계산과 동일)
+        if self.n_vis < 5 or not (self.nose_vis.mean >= 0.5):
+            return "Not Detected", 0.0, 0.0
+        var_x = float(self.rolling_x.stats.var * 10000)
+        var_y = float(self.rolling_y.stats.var * 10000)
+        return classify_head_gesture(var_x, var_y), var_x, var_y
+
+    def _posture(self):
+        if self.n_vis < 5 or not (self.shoulder_vis.mean >= 0.5):
+            return "Unknown", 0.0
+        n = self.n_vis
+        head, tail = int(n * 0.3), int(n * 0.7)
+        start_z = _nanmean([self.left_z.range_mean(0, head), self.right_z.range_mean(0, head)])
+        end_z = _nanmean([self.left_z.range_mean(tail, n), self.right_z.range_mean(tail, n)])
+        diff = start_z - end_z
+        return classify_posture(diff), float(diff)
+
+    def _gaze(self):
+        if self.n_vis < 5:
+            return "Unknown"
+        return classify_gaze(self.nose_x.std, self.nose_y.std)
+
+    def metrics(self):
+        """compute_behavior_metrics()와 같은 구조. 프레임이 5개 미만이면 None."""
+        if self.n < 5:
+            print("[WARN] CSV data too short.")
+            return None
+
+        gesture, posture, gaze = ("Not Detected", 0, 0), ("Unknown", 0), "Unknown"
+        if self.n_vis > self.n * 0.5:
+            gesture, posture, gaze = self._gesture(), self._posture(), self._gaze()
+
+        neutral = self.emotions[EMOTION_COLUMNS.index("prob_Neutral")]
+        return {
+            "duration_sec": float(self.t_max),
+            "fps_mean": float(self.fps.mean),
+            "avg_emotions": {c: float(stat.mean) for c, stat in zip(EMOTION_COLUMNS, self.emotions)},
+            "sampling_quality": {
+                "mean_level": float(self.quality.mean),
+                "max_level": int(self.quality_max),
+                "degraded_ratio": float(self.degraded / self.n),
+                "emotion_coverage": float(neutral.count / self.n)
+            },
+            "posture": (posture[0], float(posture[1])),
+            "gesture": gesture,
+            "gaze": gaze
+        }
+
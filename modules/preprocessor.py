@@ -1,19 +1,94 @@
 import pandas as pd
-import numpy as np
 import json
 import os
-from config import SEED_DIR
+from config import SEED_DIR, CACHE_DIR, USE_FEATURE_CACHE, FEATURE_CACHE_MAX_MB
+from modules.cache import DiskCache, content_key, file_sha256
+from modules.features import compute_registered_features
+from modules.log_schema import EMOTION_LABELS, MISSING_VALUE, load_log
+
+# 특징 추출 로직 버전. 아래 feature 함수나 Seed 구조가 바뀌면 올려주세요.
+# (reprocess_logs.py가 이 값이 바뀐 로그만 다시 처리합니다)
+FEATURE_VERSION = 4
+
+# behavior_metrics 계산 로직 버전 (특징 캐시 키). 해석 문구/Seed 구조만 바뀐 경우엔 올리지 않아도
+# 캐시된 metrics로 Seed를 바로 다시 만들고, 수치 계산이 바뀐 경우에만 올려서 재계산합니다.
+METRICS_VERSION = 3
+
+# 사람이 직접 라벨링한 필드 (Seed를 다시 만들 때도 보존)
+LABEL_FIELDS = ("expert_analysis", "ground_truth_preference")
+
+# 특징 추출에 실제로 쓰는 컬럼 (나머지 landmark 컬럼은 읽지 않음)
+EMOTION_COLUMNS = [f"prob_{emo}" for emo in EMOTION_LABELS]
+FEATURE_COLUMNS = ["t", "fps"] + EMOTION_COLUMNS + [
+    "nose_x", "nose_y", "nose_vis",
+    "left_shoulder_z", "left_shoulder_vis",
+    "right_shoulder_z", "right_shoulder_vis",
+    "quality_level"
+]
+FEATURE_LANDMARKS = ["nose", "left_shoulder", "right_shoulder"]
+
+# ---------------------------------------------------------
+# 0. Log Loader
+# ---------------------------------------------------------
+
+def load_frame_log(path):
+    """
+    프레임 로그(CSV / Parquet, 현재/초기 녹화기 로그 또는 예전 33-landmark wide 로그)에서
+    특징 계산에 필요한 컬럼만 float32로 읽습니다. -999 sentinel은 파싱 단계에서 바로 NaN으로 바뀝니다.
+    스키마 판별/정규화는 modules/log_schema.py 참고.
+    """
+    return load_log(path, landmarks=FEATURE_LANDMARKS).to_dataframe()
+
+def prepare_frames(frames):
+    """녹화기의 메모리 프레임 DataFrame -> 특징 컬럼만, -999는 NaN (load_frame_log와 같은 형태)"""
+    df = frames[[c for c in FEATURE_COLUMNS if c in frames.columns]]
+    return df.mask(df == MISSING_VALUE)
 
 # ---------------------------------------------------------
 # 1. Feature Extraction Logic (Rule-based)
 # ---------------------------------------------------------
 
+def classify_head_gesture(var_x, var_y):
+    """nose 좌표(rolling mean) 분산 -> 제스처 라벨 (배치/온라인 공통 판단 로직)"""
+    gesture = "Dynamic (Moving)"
+    if var_x < 0.05 and var_y < 0.05:
+        gesture = "Static (Still)"
+    elif var_x > var_y * 1.5 and var_x > 0.1: # X축 움직임이 큼
+        gesture = "Head Shaking (Negative/Confusion)"
+    elif var_y > var_x * 1.5 and var_y > 0.1: # Y축 움직임이 큼
+        gesture = "Head Nodding (Positive/Understood)"
+    return gesture
+
+def classify_posture(diff):
+    """초반 - 후반 어깨 z 평균 차이 -> 자세 라벨"""
+    # MediaPipe Z축: 카메라에 가까울수록 값이 작아짐 (음수 방향 아님, 상대값임)
+    # 하지만 보통 값의 변화량(Diff)을 봅니다.
+    # start_z > end_z : 값이 작아짐 -> 카메라 쪽으로 다가옴 (Lean Forward)
+    posture = "Stable Posture"
+    if diff > 0.05: 
+        posture = "Leaning Forward (High Engagement)"
+    elif diff < -0.05:
+        posture = "Leaning Backward (Relaxed/Low Interest)"
+    return posture
+
+def classify_gaze(std_x, std_y):
+    """nose 좌표 표준편차 -> 시선 안정성 라벨"""
+    total_instability = (std_x + std_y) * 100
+    
+    if total_instability < 2.0:
+        return "Highly Focused (Stable Gaze)"
+    elif total_instability > 8.0:
+        return "Distracted/Searching (Unstable Gaze)"
+    else:
+        return "Normal Gaze"
+
 def detect_head_gesture(df_vis):
     """
     코(nose)의 좌표 분산을 이용해 끄덕임(Nodding)과 가로저음(Shaking)을 감지
     """
     # 데이터가 너무 적거나 코가 안 보이면 스킵
-    if len(df_vis) < 5 or df_vis['nose_vis'].mean() < 0.5:
+    # (nose_vis가 없는 legacy 로그는 평균이 NaN -> 보이지 않는 것으로 취급)
+    if len(df_vis) < 5 or not (df_vis['nose_vis'].mean() >= 0.5):
         return "Not Detected", 0.0, 0.0
 
     # 노이즈 제거 (Rolling Mean)
@@ -24,16 +99,7 @@ def detect_head_gesture(df_vis):
     var_x = float(nose_x.var() * 10000)
     var_y = float(nose_y.var() * 10000)
 
-    # 판단 로직
-    gesture = "Dynamic (Moving)"
-    if var_x < 0.05 and var_y < 0.05:
-        gesture = "Static (Still)"
-    elif var_x > var_y * 1.5 and var_x > 0.1: # X축 움직임이 큼
-        gesture = "Head Shaking (Negative/Confusion)"
-    elif var_y > var_x * 1.5 and var_y > 0.1: # Y축 움직임이 큼
-        gesture = "Head Nodding (Positive/Understood)"
-    
-    return gesture, var_x, var_y
+    return classify_head_gesture(var_x, var_y), var_x, var_y
 
 def analyze_posture_lean(df_vis):
     """
@@ -43,26 +109,16 @@ def analyze_posture_lean(df_vis):
         return "Unknown", 0.0
 
     # 어깨가 잘 안 보이면 스킵
-    if df_vis['left_shoulder_vis'].mean() < 0.5:
+    if not (df_vis['left_shoulder_vis'].mean() >= 0.5):
         return "Unknown", 0.0
 
     # 초반 30% vs 후반 30% 비교
     n = len(df_vis)
     start_z = df_vis[['left_shoulder_z', 'right_shoulder_z']].iloc[:int(n*0.3)].mean().mean()
     end_z = df_vis[['left_shoulder_z', 'right_shoulder_z']].iloc[int(n*0.7):].mean().mean()
-    
-    # MediaPipe Z축: 카메라에 가까울수록 값이 작아짐 (음수 방향 아님, 상대값임)
-    # 하지만 보통 값의 변화량(Diff)을 봅니다.
-    # start_z > end_z : 값이 작아짐 -> 카메라 쪽으로 다가옴 (Lean Forward)
     diff = start_z - end_z 
 
-    posture = "Stable Posture"
-    if diff > 0.05: 
-        posture = "Leaning Forward (High Engagement)"
-    elif diff < -0.05:
-        posture = "Leaning Backward (Relaxed/Low Interest)"
-
-    return posture, float(diff)
+    return classify_posture(diff), float(diff)
 
 def analyze_gaze_stability(df_vis):
     """
@@ -71,33 +127,25 @@ def analyze_gaze_stability(df_vis):
     """
     if len(df_vis) < 5: return "Unknown"
     
-    std_x = df_vis['nose_x'].std()
-    std_y = df_vis['nose_y'].std()
-    total_instability = (std_x + std_y) * 100
-    
-    if total_instability < 2.0:
-        return "Highly Focused (Stable Gaze)"
-    elif total_instability > 8.0:
-        return "Distracted/Searching (Unstable Gaze)"
-    else:
-        return "Normal Gaze"
+    return classify_gaze(df_vis['nose_x'].std(), df_vis['nose_y'].std())
+
+def dominant_emotion(avg_emotions):
+    """평균 감정 확률 {prob_*: 값} -> (Neutral을 제외한 최댓값 감정, 점수)"""
+    sorted_emos = pd.Series(avg_emotions, dtype=float).drop("prob_Neutral", errors='ignore').sort_values(ascending=False)
+    dom_emo_name = sorted_emos.index[0].replace("prob_", "") if not sorted_emos.empty else "None"
+    dom_emo_score = sorted_emos.iloc[0] if not sorted_emos.empty else 0.0
+    return dom_emo_name, float(dom_emo_score)
 
 # ---------------------------------------------------------
-# 2. Main Processing Function
+# 2. Metrics -> Interpretation -> Seed
 # ---------------------------------------------------------
 
-def process_csv_to_json(csv_path, option_data, session_id):
+def compute_behavior_metrics(df):
     """
-    CSV 로그를 읽어 통계적 특징을 추출하고, LLM이 해석할 수 있는 
-    자연어 요약(interpretation)을 포함한 JSON Seed를 생성합니다.
+    프레임 DataFrame(-999는 이미 NaN)에서 Seed의 behavior_metrics 계산.
+    modules/online_features.py의 OnlineBehaviorFeatures.metrics()와 같은 구조를 반환합니다.
+    데이터가 부족하면 None.
     """
-    try:
-        df = pd.read_csv(csv_path)
-        df.replace(-999, np.nan, inplace=True)
-    except Exception as e:
-        print(f"[ERR] Failed to load CSV: {e}")
-        return None
-
     # [방어 코드 추가] 필수 컬럼 확인
     required_cols = ['nose_x', 'nose_vis', 'left_shoulder_z']
     for col in required_cols:
@@ -115,12 +163,18 @@ def process_csv_to_json(csv_path, option_data, session_id):
 
     # --- A. 감정 분석 (Emotion Stats) ---
     emotion_cols = [c for c in df.columns if c.startswith("prob_")]
-    avg_emotions = df[emotion_cols].mean()
-    
-    # Dominant Emotion (Neutral 제외)
-    sorted_emos = avg_emotions.drop("prob_Neutral", errors='ignore').sort_values(ascending=False)
-    dom_emo_name = sorted_emos.index[0].replace("prob_", "") if not sorted_emos.empty else "None"
-    dom_emo_score = sorted_emos.iloc[0] if not sorted_emos.empty else 0.0
+    avg_emotions = {c: float(v) for c, v in df[emotion_cols].mean().items()}
+
+    # --- A-2. 측정 품질 (Adaptive Quality) ---
+    # 감정 분석을 건너뛴 프레임은 -999 -> NaN 이므로 위 평균에서 이미 제외됨
+    sampling_quality = None
+    if 'quality_level' in df.columns:
+        sampling_quality = {
+            "mean_level": float(df['quality_level'].mean()),
+            "max_level": int(df['quality_level'].max()),
+            "degraded_ratio": float((df['quality_level'] > 0).mean()),
+            "emotion_coverage": float(df['prob_Neutral'].notna().mean()) if 'prob_Neutral' in df.columns else 1.0
+        }
 
     # --- B. 행동 분석 (Pose Analysis) ---
     gesture, nose_var_x, nose_var_y = ("Not Detected", 0, 0)
@@ -132,8 +186,30 @@ def process_csv_to_json(csv_path, option_data, session_id):
         posture, posture_diff = analyze_posture_lean(df_vis)
         gaze_stability = analyze_gaze_stability(df_vis)
 
-    # --- C. Rule-based Interpretation (LLM Input용 핵심 요약) ---
-    # 나중에 행동 심리학자 에이전트가 이 문장을 참고합니다.
+    # --- B-2. 시계열 특징 (modules/features.py 레지스트리, 한 번의 벡터 연산 패스) ---
+    time_series = compute_registered_features(df)
+
+    return {
+        "duration_sec": float(df['t'].max()),
+        "fps_mean": float(df['fps'].mean()),
+        "avg_emotions": avg_emotions,
+        "sampling_quality": sampling_quality,
+        "posture": (posture, float(posture_diff)),
+        "gesture": (gesture, nose_var_x, nose_var_y),
+        "gaze": gaze_stability,
+        "time_series": time_series
+    }
+
+def interpret_metrics(metrics):
+    """
+    --- C. Rule-based Interpretation (LLM Input용 핵심 요약) ---
+    나중에 행동 심리학자 에이전트가 이 문장을 참고합니다.
+    """
+    posture = metrics["posture"][0]
+    gesture = metrics["gesture"][0]
+    gaze_stability = metrics["gaze"]
+    dom_emo_name, _ = dominant_emotion(metrics["avg_emotions"])
+
     interpretations = []
     
     # 1. 자세 해석
@@ -160,16 +236,23 @@ def process_csv_to_json(csv_path, option_data, session_id):
     if "Distracted" in gaze_stability:
         interpretations.append("Gaze was unstable, suggesting the user was skimming or looking for information.")
     
-    final_interpretation = " ".join(interpretations) if interpretations else "User showed neutral behavior with no significant signals."
+    return " ".join(interpretations) if interpretations else "User showed neutral behavior with no significant signals."
+
+def build_seed(metrics, option_data, session_id, csv_path, labels=None):
+    """--- D. JSON 구조화 ---"""
+    posture, posture_diff = metrics["posture"]
+    gesture, nose_var_x, nose_var_y = metrics["gesture"]
+    dom_emo_name, dom_emo_score = dominant_emotion(metrics["avg_emotions"])
 
-    # --- D. JSON 구조화 ---
     seed_data = {
         "meta": {
             "session_id": session_id,
             "option_id": option_data.get('id', 'unknown'),
             "timestamp": pd.Timestamp.now().isoformat(),
             "csv_source": os.path.basename(csv_path),
-            "user_context": option_data.get('user_context', 'Unknown Context')
+            "feature_version": FEATURE_VERSION,
+            "user_context": option_data.get('user_context', 'Unknown Context'),
+            "sampling_quality": metrics["sampling_quality"]
         },
         "stimulus_content": {
             "title": option_data.get('title', ''),
@@ -179,13 +262,13 @@ def process_csv_to_json(csv_path, option_data, session_id):
             "cons": option_data.get('cons', [])
         },
         "behavior_metrics": {
-            "duration_sec": float(df['t'].max()),
-            "fps_mean": float(df['fps'].mean()),
+            "duration_sec": metrics["duration_sec"],
+            "fps_mean": metrics["fps_mean"],
             "dominant_emotion": {
                 "emotion": dom_emo_name,
-                "score": float(dom_emo_score)
+                "score": dom_emo_score
             },
-            "emotion_full_stats": {k.replace("prob_", ""): float(v) for k, v in avg_emotions.items()},
+            "emotion_full_stats": {k.replace("prob_", ""): float(v) for k, v in metrics["avg_emotions"].items()},
             "posture": {
                 "label": posture,
                 "z_diff": float(posture_diff)
@@ -196,19 +279,76 @@ def process_csv_to_json(csv_path, option_data, session_id):
                 "var_y": nose_var_y
             },
             "gaze": {
-                "label": gaze_stability
-            }
+                "label": metrics["gaze"]
+            },
+            **metrics.get("time_series", {})
         },
-        "rule_based_interpretation": final_interpretation,
+        "rule_based_interpretation": interpret_metrics(metrics),
         "expert_analysis": None  # Placeholder for Step 2
     }
+    if labels:
+        seed_data.update({k: v for k, v in labels.items() if k in LABEL_FIELDS})
+    return seed_data
 
-    # --- E. 저장 ---
-    out_name = f"seed_{session_id}_{option_data.get('id', 'opt')}.json"
+def write_seed(seed_data, session_id, option_id):
+    """--- E. 저장 ---"""
+    out_name = f"seed_{session_id}_{option_id}.json"
     out_path = os.path.join(SEED_DIR, out_name)
     
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(seed_data, f, ensure_ascii=False, indent=2)
 
     print(f"[PROCESS] JSON Seed created: {out_path}")
-    return out_path
\ No newline at end of file
+    return out_path
+
+_feature_cache = None
+
+def feature_cache():
+    """behavior_metrics 캐시 (data/cache/features.sqlite). USE_FEATURE_CACHE=False면 None"""
+    global _feature_cache
+    if _feature_cache is None and USE_FEATURE_CACHE:
+        _feature_cache = DiskCache(os.path.join(CACHE_DIR, "features.sqlite"),
+                                   max_bytes=FEATURE_CACHE_MAX_MB * 1024 * 1024)
+    return _feature_cache
+
+def load_or_compute_metrics(path):
+    """로그 파일의 내용 해시 + METRICS_VERSION으로 캐시를 찾고, 없을 때만 읽어서 계산"""
+    cache = feature_cache()
+    key = None
+    if cache is not None:
+        key = content_key("behavior_metrics", METRICS_VERSION, file_sha256(path))
+        metrics = cache.get(key)
+        if metrics is not None:
+            return metrics
+
+    metrics = compute_behavior_metrics(load_frame_log(path))
+    if key is not None and metrics is not None:
+        cache.set(key, metrics)
+    return metrics
+
+def process_csv_to_json(csv_path, option_data, session_id, frames=None, labels=None, metrics=None):
+    """
+    CSV 로그를 읽어 통계적 특징을 추출하고, LLM이 해석할 수 있는 
+    자연어 요약(interpretation)을 포함한 JSON Seed를 생성합니다.
+    frames: 녹화기가 메모리에 들고 있는 프레임 DataFrame (주어지면 로그 파일을 다시 읽지 않음)
+    labels: 기존 Seed에서 가져온 라벨 필드 (LABEL_FIELDS). 주어지면 새 Seed에 그대로 유지
+    metrics: 녹화 중 온라인으로 계산된 특징 (주어지면 로그를 읽지도, 다시 계산하지도 않음. 시계열 특징만 frames에서 계산)
+    """
+    if metrics is None:
+        try:
+            if frames is not None:
+                metrics = compute_behavior_metrics(prepare_frames(frames))
+            else:
+                metrics = load_or_compute_metrics(csv_path)
+        except Exception as e:
+            print(f"[ERR] Failed to load CSV: {e}")
+            return None
+
+        if metrics is None:
+            return None
+    elif "time_series" not in metrics and frames is not None:
+        # 녹화기의 온라인 특징에는 시계열 특징이 없음 -> 메모리상의 프레임에서 한 번에 계산
+        metrics = {**metrics, "time_series": compute_registered_features(prepare_frames(frames))}
+
+    seed_data = build_seed(metrics, option_data, session_id, csv_path, labels=labels)
+    return write_seed(seed_data, session_id, option_data.get('id', 'opt'))
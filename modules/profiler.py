@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageTimer:
+    """
+    녹화 루프의 단계별(카메라, pose, 얼굴 검출, 감정, 화면 출력 등) 소요 시간을 프레임마다 기록하고
+    p50/p95/p99 히스토그램으로 요약합니다. 여러 스레드(캡처/추론/UI)에서 동시에 기록해도 안전합니다.
+    max_samples: 단계별로 보관할 최근 샘플 수 (None이면 전부, 오래 도는 프로세스에서 메모리 상한)
+    """
+    def __init__(self, recent=30, max_samples=None):
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self._recent = defaultdict(lambda: deque(maxlen=recent))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._recent[name].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._recent.clear()
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        with self._lock:
+            samples = {name: np.array(values) * 1000 for name, values in self._samples.items()}
+
+        stats = {}
+        for name, ms in samples.items():
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stats[name] = {
+                "count": int(len(ms)),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(ms.max()), 3)
+            }
+        return stats
+
+    def overlay_lines(self):
+        """Monitor 창 오버레이용: 최근 N프레임 평균 (ms)"""
+        with self._lock:
+            recent = {name: list(values) for name, values in self._recent.items()}
+        return [f"{name}: {np.mean(values) * 1000:.1f}ms" for name, values in recent.items() if values]
+
+    def write_sidecar(self, path, extra=None):
+        """로그 옆에 {로그이름}_timing.json 으로 단계별 지연 통계를 저장"""
+        data = dict(extra or {})
+        data["stages"] = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
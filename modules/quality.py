@@ -0,0 +1,63 @@
+from collections import namedtuple
+
+# 품질 단계 (0 = 최고 품질). 아래로 내려갈수록 가볍지만 정밀도가 떨어집니다.
+#   scale              : 입력 프레임 축소 비율
+#   pose_complexity    : MediaPipe Pose model_complexity (1 -> 0 = Lite)
+#   detect_interval_x  : 얼굴 전체 검출 주기 배수 (FACE_DETECT_INTERVAL * x)
+#   emotion_stride     : 감정 분석을 k프레임에 한 번만 수행 (나머지 프레임은 결측 처리)
+QualityLevel = namedtuple("QualityLevel", ["scale", "pose_complexity", "detect_interval_x", "emotion_stride"])
+
+QUALITY_LADDER = [
+    QualityLevel(1.0, 1, 1, 1),    # 0: full quality
+    QualityLevel(0.75, 1, 1, 1),   # 1: input downscaling
+    QualityLevel(0.75, 0, 1, 1),   # 2: + lite pose model
+    QualityLevel(0.5, 0, 2, 1),    # 3: + smaller input, less frequent face detection
+    QualityLevel(0.5, 0, 2, 2),    # 4: + emotion every 2nd frame
+    QualityLevel(0.5, 0, 4, 3),    # 5: + emotion every 3rd frame
+]
+
+
+class QualityScheduler:
+    """
+    프레임 처리 시간을 온라인으로 측정(EMA)해서 목표 샘플링 레이트(target_fps)를 맞출 때까지
+    QUALITY_LADDER를 한 단계씩 내려가고, 여유가 충분하면 다시 올라옵니다.
+    """
+    def __init__(self, target_fps, ladder=QUALITY_LADDER, window=15, alpha=0.2, headroom=1.5):
+        self.target_fps = target_fps
+        self.ladder = ladder
+        self.window = window        # 단계를 바꾼 뒤 최소 이 프레임 수만큼은 유지 (진동 방지)
+        self.alpha = alpha          # EMA 계수
+        self.headroom = headroom    # 목표보다 이 배수 이상 빠를 때만 품질을 다시 올림
+        self.level = 0
+        self._ema = None
+        self._since_change = 0
+
+    @property
+    def current(self):
+        return self.ladder[self.level]
+
+    @property
+    def measured_fps(self):
+        return 1.0 / self._ema if self._ema else 0.0
+
+    def update(self, frame_seconds):
+        """프레임 하나의 처리 시간(초)을 반영하고 다음 프레임에 쓸 품질 단계를 반환"""
+        if self._ema is None:
+            self._ema = frame_seconds
+        else:
+            self._ema = self.alpha * frame_seconds + (1 - self.alpha) * self._ema
+        self._since_change += 1
+
+        if self._since_change >= self.window:
+            fps = self.measured_fps
+            if fps < self.target_fps and self.level < len(self.ladder) - 1:
+                self._change(self.level + 1)
+            elif fps > self.target_fps * self.headroom and self.level > 0:
+                self._change(self.level - 1)
+        return self.level
+
+    def _change(self, level):
+        print(f"[QUALITY] {self.measured_fps:.1f} fps (target {self.target_fps}) -> level {self.level} => {level}")
+        self.level = level
+        self._since_change = 0
+        self._ema = None
@@ -0,0 +1,60 @@
+import random
+import threading
+import time
+
+# 일시적인 오류로 보고 재시도할 예외 (google.api_core.exceptions 클래스 이름 기준)
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "Aborted"
+}
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 토큰이 차는 버킷 (최대 capacity개). acquire()는 토큰이 생길 때까지 대기합니다.
+    여러 스레드가 같은 버킷을 공유해 전체 요청 속도(RPM)를 제한합니다.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, burst=None):
+        return cls(requests_per_minute / 60.0, capacity=burst)
+
+    def acquire(self, tokens=1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(error):
+    return type(error).__name__ in RETRYABLE_ERRORS or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def call_with_retry(fn, limiter=None, retries=4, base_delay=1.0, max_delay=30.0, label="LLM"):
+    """
+    fn()을 호출하고, 일시적인 오류(429/503/timeout 등)면 지수 백오프(+jitter)로 다시 시도합니다.
+    limiter(TokenBucket)가 있으면 매 시도 전에 토큰을 받습니다. 마지막 시도도 실패하면 예외를 그대로 올립니다.
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            print(f"[RETRY] {label}: {type(e).__name__} -> retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
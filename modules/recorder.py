@@ -1,18 +1,98 @@
 import cv2
-import torch
 import numpy as np
 import time
 import os
-import csv
+import json
+import threading
+import cProfile
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
-from facenet_pytorch import MTCNN
-from emotiefflib.facial_analysis import EmotiEffLibRecognizer
-import mediapipe as mp
-from config import LOG_DIR, USE_POSE
+from config import (
+    LOG_DIR, VIDEO_DIR, USE_POSE, CAPTURE_ONLY, FACE_DETECT_INTERVAL, EMOTION_BATCH_SIZE, LOG_FORMAT,
+    USE_INFERENCE_SERVER, SHOW_TIMING_OVERLAY, PROFILE_NEXT_TRIAL, TARGET_FPS
+)
+from modules.capture import CameraStream, VideoSink
+from modules.face_tracker import FaceTracker, EmotionBatcher, crop_face
+from modules.renderer import StimulusRenderer, draw_pose_landmarks
+from modules.log_writer import FrameLogWriter
+from modules.frame_buffer import FrameBuffer
+from modules.profiler import StageTimer
+from modules.quality import QualityScheduler
+from modules.online_features import OnlineBehaviorFeatures
+from modules.inference_server import connect_inference_server, RemotePose, RemoteMTCNN, RemoteRecognizer
 
-class BehaviorRecorder:
+
+class SessionState:
+    """녹화 세션 동안 UI 루프와 추론 워커가 공유하는 상태"""
     def __init__(self):
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.recording = False
+        self.start_time = 0.0
+        self.start_index = 0
+        self.buffer = None   # FrameBuffer (프레임 저장소)
+        self.committed = 0   # 온라인 특징에 반영한 행 수 (감정 배치 추론이 끝난 행까지만)
+        self.written = 0     # 로그 writer로 넘긴 행 수 (확정된 행을 writer.chunk_size씩 모아서 넘김)
+        self.writer = None   # FrameLogWriter (녹화 시작 시 생성)
+        self.features = None  # OnlineBehaviorFeatures (확정된 행마다 특징 갱신)
+        self.profile_path = None  # 설정 시 추론 워커를 cProfile로 덤프
+        self.latest = None  # (pose_landmarks, top_emo)
+
+
+class BehaviorRecorder:
+    def __init__(self, capture_only=CAPTURE_ONLY, use_server=USE_INFERENCE_SERVER, target_fps=TARGET_FPS):
+        # capture_only: 녹화 중에는 영상만 저장하고 분석은 나중에 (modules/offline_analyzer.py)
+        # target_fps: 목표 샘플링 레이트 (설정 시 QualityScheduler가 품질을 자동으로 낮춤)
+        self.capture_only = capture_only
+        self.target_fps = target_fps
+        self.pose = None
+        self.client = None
+        self.mp_pose = None
+        self.mp_drawing = None
+        self.last_frames = None  # 마지막 세션의 프레임 DataFrame (전처리기로 직접 전달용)
+        self.last_metrics = None  # 마지막 세션의 온라인 특징 (전처리기 재계산 생략용)
+        self.timer = StageTimer()
+        self.profile_next_trial = PROFILE_NEXT_TRIAL
+
+        if not capture_only:
+            # 상주 추론 서버(modules/inference_server.py)가 떠 있으면 모델 로드 없이 바로 연결
+            if use_server:
+                self.client = connect_inference_server()
+
+            if self.client:
+                print("[INFO] Connected to inference server (models already warm).")
+                self.mtcnn = RemoteMTCNN(self.client)
+                self.rec = RemoteRecognizer(self.client)
+                if USE_POSE:
+                    self.pose = RemotePose(self.client)
+            else:
+                self._load_models()
+
+            # 얼굴: N프레임마다만 전체 검출 + 사이 프레임은 추적, 감정은 micro-batch 추론
+            self.face_tracker = FaceTracker(self._detect_faces, detect_interval=FACE_DETECT_INTERVAL)
+            self.emotion_batcher = EmotionBatcher(self.predict_emotions, batch_size=EMOTION_BATCH_SIZE)
+        else:
+            print("[INFO] Initializing Recorder in capture-only mode (no models loaded)...")
+
+        self.renderer = StimulusRenderer(width=900, height=600)
+
+        self.emotion_labels = ["Anger", "Contempt", "Disgust", "Fear", "Happiness", "Neutral", "Sadness", "Surprise"]
+        
+        self.csv_fieldnames = [
+            "t", "fps", "capture_fps", "top_emotion"
+        ] + [f"prob_{emo}" for emo in self.emotion_labels] + [
+            "nose_x", "nose_y", "nose_vis",
+            "left_shoulder_z", "left_shoulder_vis",
+            "right_shoulder_z", "right_shoulder_vis",
+            "quality_level"
+        ]
+
+    def _load_models(self):
+        # 무거운 모델 의존성은 로컬에서 로드할 때만 import (서버 클라이언트는 바로 시작)
+        import torch
+        import mediapipe as mp
+        from facenet_pytorch import MTCNN
+        from emotiefflib.facial_analysis import EmotiEffLibRecognizer
+
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"[INFO] Initializing Recorder on {self.device}...")
         
@@ -21,7 +101,6 @@ class BehaviorRecorder:
         self.rec = EmotiEffLibRecognizer(engine="torch", model_name="enet_b0_8_best_vgaf", device=self.device)
         
         # MediaPipe Pose
-        self.pose = None
         if USE_POSE:
             self.mp_pose = mp.solutions.pose
             self.mp_drawing = mp.solutions.drawing_utils
@@ -31,164 +110,316 @@ class BehaviorRecorder:
                 min_detection_confidence=0.5, 
                 min_tracking_confidence=0.5
             )
+            self._poses = {1: self.pose}
 
-        self.emotion_labels = ["Anger", "Contempt", "Disgust", "Fear", "Happiness", "Neutral", "Sadness", "Surprise"]
-        
-        self.csv_fieldnames = [
-            "t", "fps", "top_emotion"
-        ] + [f"prob_{emo}" for emo in self.emotion_labels] + [
-            "nose_x", "nose_y", "nose_vis",
-            "left_shoulder_z", "left_shoulder_vis",
-            "right_shoulder_z", "right_shoulder_vis"
-        ]
+    def _detect_faces(self, frame_rgb):
+        """MTCNN 전체 검출. 박스는 큰 얼굴 순으로 정렬되어 반환됩니다."""
+        with self.timer.stage("face_detect"):
+            boxes, _ = self.mtcnn.detect(frame_rgb)
+        return boxes
 
-    def put_korean_text(self, img, text, pos, font_size, color):
-        """OpenCV 이미지에 한글 텍스트 그리기"""
-        img_pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(img_pil)
-        try:
-            font = ImageFont.truetype("malgun.ttf", font_size)
-        except OSError:
-            font = ImageFont.load_default()
-        draw.text(pos, text, font=font, fill=color)
-        return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
+    def predict_emotions(self, face_crops):
+        """얼굴 crop 목록을 한 번에(batch) 감정 분석. Returns: (N, 8) 확률 배열"""
+        with self.timer.stage("emotion_batch"):
+            _, scores = self.rec.predict_emotions(face_crops, logits=False)
+        return np.array(scores)
+
+    def _pose_for(self, quality):
+        """품질 단계의 model_complexity에 맞는 Pose 인스턴스 (처음 필요할 때 한 번만 생성)"""
+        if quality is None or self.client or quality.pose_complexity not in (0, 2):
+            return self.pose
+        if quality.pose_complexity not in self._poses:
+            self._poses[quality.pose_complexity] = self.mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=quality.pose_complexity,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        return self._poses[quality.pose_complexity]
+
+    def analyze_frame(self, frame_rgb, tracker=None, quality=None, pose=None):
+        """
+        한 프레임에 대해 Pose 추정 + 얼굴 추적을 수행합니다.
+        감정 분석은 EmotionBatcher로 모아서 처리하므로 여기서는 얼굴 crop만 돌려줍니다.
+        quality: QualityLevel (입력 축소, Pose 경량화, 얼굴 검출 주기). None이면 최고 품질.
+        tracker/pose: 여러 스트림을 한 모델로 처리할 때 스트림별 추적 상태 (None이면 기본 인스턴스)
+        Returns: (pose_landmarks, face_crop or None)
+        """
+        if quality is not None and quality.scale < 1.0:
+            with self.timer.stage("downscale"):
+                frame_rgb = cv2.resize(frame_rgb, None, fx=quality.scale, fy=quality.scale,
+                                       interpolation=cv2.INTER_AREA)
+
+        pose_landmarks = None
+        if pose is None and self.pose:
+            pose = self._pose_for(quality)
+        if pose:
+            with self.timer.stage("pose"):
+                res = pose.process(frame_rgb)
+            pose_landmarks = res.pose_landmarks
+
+        tracker = tracker or self.face_tracker
+        tracker.interval_x = quality.detect_interval_x if quality is not None else 1
+        with self.timer.stage("face_track"):
+            box = tracker.update(frame_rgb)
+            face_crop = crop_face(frame_rgb, box) if box is not None else None
+
+        return pose_landmarks, face_crop
+
+    def new_frame_buffer(self):
+        """csv_fieldnames 컬럼을 갖는 빈 프레임 저장소 (Pose 미검출 = -999, 얼굴 미검출 = 확률 0)"""
+        return FrameBuffer(self.csv_fieldnames, self.emotion_labels, defaults={
+            "nose_x": -999, "nose_y": -999,
+            "left_shoulder_z": -999, "right_shoulder_z": -999
+        })
+
+    def record_frame(self, buffer, t_elapsed, fps, capture_fps, pose_landmarks, quality_level=0):
+        """프레임 하나를 buffer에 기록하고 행 인덱스를 반환 (감정 값은 apply_emotions가 나중에 채움)"""
+        i = buffer.append()
+        row = buffer.values[i]
+        col = buffer.col
+        row[col["t"]] = t_elapsed
+        row[col["fps"]] = fps
+        row[col["capture_fps"]] = capture_fps
+        row[col["quality_level"]] = quality_level
+
+        # Pose Data Filling
+        if pose_landmarks:
+            lm = pose_landmarks.landmark
+            row[col["nose_x"]] = lm[0].x
+            row[col["nose_y"]] = lm[0].y
+            row[col["nose_vis"]] = lm[0].visibility
+
+            row[col["left_shoulder_z"]] = lm[11].z
+            row[col["left_shoulder_vis"]] = lm[11].visibility
+
+            row[col["right_shoulder_z"]] = lm[12].z
+            row[col["right_shoulder_vis"]] = lm[12].visibility
+
+        return i
+
+    def apply_emotions(self, buffer, completed):
+        """
+        배치 추론이 끝난 (행 인덱스, probs) 결과를 이미 기록된 행에 채워 넣습니다.
+        Returns: 가장 최근 프레임의 top emotion (결과가 없으면 None)
+        """
+        top_emo = None
+        for i, probs in completed:
+            if i is None:
+                top_emo = self.emotion_labels[int(np.argmax(probs))]
+            else:
+                top_emo = buffer.set_probs(i, probs)
+        return top_emo
+
+    def _inference_loop(self, frames, stream, state):
+        """
+        [추론 워커] 캡처 스레드가 넣어준 최신 프레임만 꺼내 분석합니다.
+        처리 중 들어온 프레임은 LatestFrameQueue에서 자동으로 버려집니다.
+        """
+        top_emo = "none"
+        buffer = state.buffer
+
+        # target_fps가 설정되면 처리 시간에 따라 품질 단계를 자동 조절
+        scheduler = QualityScheduler(self.target_fps) if self.target_fps else None
+        quality = scheduler.current if scheduler else None
+
+        while not state.stop_event.is_set():
+            frame = frames.get(timeout=0.5)
+            if frame is None:
+                if frames.closed:
+                    break
+                continue
+
+            t_frame = time.perf_counter()
+            frame_rgb = cv2.cvtColor(frame.image, cv2.COLOR_BGR2RGB)
+            pose_landmarks, face_crop = self.analyze_frame(frame_rgb, quality=quality)
+
+            with state.lock:
+                recording = state.recording and frame.timestamp >= state.start_time
+                start_time = state.start_time
+                start_index = state.start_index
+
+            i = None
+            if recording:
+                # 녹화 시작 이후 프레임만 기록 (t는 캡처 시각 기준)
+                t_elapsed = frame.timestamp - start_time
+                wall_elapsed = time.time() - start_time
+                fps = 1.0 / (0.001 + (wall_elapsed / (len(buffer) + 1)))
+                capture_fps = (stream.frame_count - start_index) / (0.001 + wall_elapsed)
+                i = self.record_frame(buffer, t_elapsed, fps, capture_fps, pose_landmarks,
+                                      quality_level=scheduler.level if scheduler else 0)
+
+            skip_emotion = quality is not None and frame.index % quality.emotion_stride != 0
+            if face_crop is None:
+                top_emo = "none"
+            elif skip_emotion:
+                # 감정 분석을 건너뛴 프레임은 결측(-999)으로 기록 -> 전처리에서 평균에서 제외
+                if i is not None:
+                    buffer.values[i, buffer.prob_slice] = -999
+            else:
+                top_emo = self.apply_emotions(buffer, self.emotion_batcher.submit(face_crop, i)) or top_emo
+
+            # 배치에 대기 중인 crop이 없으면 지금까지의 행은 모두 확정 -> 특징 갱신 (로그는 chunk 단위)
+            if len(buffer) > state.committed and self.emotion_batcher.pending == 0:
+                self._commit_rows(state)
+
+            with state.lock:
+                state.latest = (pose_landmarks, top_emo)
 
-    def create_stimulus_image(self, width=800, height=600):
-        """텍스트를 보여줄 빈 캔버스(검은 배경) 생성"""
-        return np.zeros((height, width, 3), dtype=np.uint8)
+            frame_seconds = time.perf_counter() - t_frame
+            self.timer.record("frame_total", frame_seconds)
+            if scheduler:
+                level = scheduler.level
+                if scheduler.update(frame_seconds) != level:
+                    quality = scheduler.current
+                    # 입력 해상도가 바뀌면 추적 중인 얼굴 박스 좌표가 맞지 않으므로 재검출
+                    self.face_tracker.reset()
+
+        # 배치에 남아 있는 crop 마저 처리
+        self.apply_emotions(buffer, self.emotion_batcher.flush())
+        self._commit_rows(state, final=True)
+
+    def _commit_rows(self, state, final=False):
+        """
+        감정 값까지 채워진 [committed, n) 행을 온라인 특징 추출기에 넘기고,
+        확정된 행이 writer.chunk_size만큼 모이면(또는 Trial 끝) 한 블록으로 로그 writer에 넘김
+        """
+        stop = len(state.buffer)
+        if stop > state.committed:
+            state.features.update_from_buffer(state.buffer, state.committed, stop)
+            state.committed = stop
+        if stop - state.written >= state.writer.chunk_size or (final and stop > state.written):
+            state.writer.write_frames(state.buffer.to_dataframe(state.written, stop))
+            state.written = stop
+
+    def _inference_worker(self, frames, stream, state):
+        """추론 워커 스레드 진입점. profile_path가 있으면 이 Trial의 워커를 cProfile로 덤프합니다."""
+        if not state.profile_path:
+            self._inference_loop(frames, stream, state)
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(self._inference_loop, frames, stream, state)
+        finally:
+            profiler.dump_stats(state.profile_path)
+            print(f"[PROFILE] Inference worker profile saved to {state.profile_path}")
 
     def record_session(self, option_data, session_id):
-        cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        if not cap.isOpened():
+        # 단계별 지연 측정 (Trial마다 새로 집계 -> 로그 옆 _timing.json)
+        self.timer = StageTimer()
+        stream = CameraStream(0, cv2.CAP_DSHOW, timer=self.timer)
+        if not stream.is_opened():
             print("[ERROR] Webcam not found.")
             return None
 
-        # 텍스트 데이터 준비
-        title_text = f"주제: {option_data.get('title', 'Option')}"
-        summary_text = option_data.get('summary', '')
-        buying_point = option_data.get('buying_point', '')
+        # 텍스트 화면 준비 (선택지별로 한 번만 렌더링)
+        standby_screen = self.renderer.standby_screen()
+        recording_screen = self.renderer.recording_screen(option_data)
         
-        # 상태 변수
-        is_recording = False
-        start_time = 0
-        records = []
+        # 상태 변수 (UI 루프 <-> 추론 워커 공유)
+        state = SessionState()
+        self.last_frames = None
+        self.last_metrics = None
+        if not self.capture_only:
+            self.face_tracker.reset()
+            state.buffer = self.new_frame_buffer()
+            state.features = OnlineBehaviorFeatures(state.buffer.col)
         
-        filename = os.path.join(LOG_DIR, f"{session_id}_{option_data['id']}_{datetime.now().strftime('%H%M%S')}.csv")
+        base_name = f"{session_id}_{option_data['id']}_{datetime.now().strftime('%H%M%S')}"
+        filename = os.path.join(LOG_DIR, f"{base_name}.csv")
+
+        # PROFILE_NEXT_TRIAL: 다음 Trial 한 번만 cProfile 덤프
+        if self.profile_next_trial and not self.capture_only:
+            state.profile_path = os.path.join(LOG_DIR, f"{base_name}_worker.prof")
+            self.profile_next_trial = False
         
+        # 파이프라인 시작: 캡처 스레드 -> (최신 프레임 큐) -> 추론 워커 / UI 루프
+        ui_frames = stream.subscribe()
+        sink = None
+        worker = None
+        if self.capture_only:
+            # 분석 없이 모든 프레임을 영상으로 저장
+            sink = VideoSink(os.path.join(VIDEO_DIR, f"{base_name}.mp4"), fps=stream.fps)
+            stream.add_subscriber(sink)
+        else:
+            infer_frames = stream.subscribe()
+            worker = threading.Thread(target=self._inference_worker, args=(infer_frames, stream, state),
+                                      name="InferenceWorker", daemon=True)
+        stream.start()
+        if worker is not None:
+            worker.start()
+
         print(f"[READY] Windows opened. Look at the 'Stimulus' window.")
 
         # 창 위치 설정을 위한 플래그
         windows_positioned = False
+        quit_by_user = False
+        last_frame = None
 
         while True:
-            ret, frame = cap.read()
-            if not ret: break
+            frame = ui_frames.get(timeout=0.05)
+            if frame is None:
+                if ui_frames.closed:
+                    break
+                if last_frame is None:
+                    continue
+                frame = last_frame
+            last_frame = frame
+            t_ui = time.perf_counter()
             
             # --- 1. Monitor Window (웹캠 화면) ---
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            monitor_frame = frame.copy() # 웹캠 원본
-            
-            # Pose Drawing
-            pose_landmarks = None
-            if self.pose:
-                res = self.pose.process(frame_rgb)
-                if res.pose_landmarks:
-                    self.mp_drawing.draw_landmarks(monitor_frame, res.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
-                    pose_landmarks = res.pose_landmarks.landmark
-
-            # Emotion Analysis
-            faces = self.mtcnn(frame_rgb)
+            monitor_frame = frame.image.copy() # 웹캠 원본
+
+            with state.lock:
+                latest = state.latest
+                is_recording = state.recording
+                start_time = state.start_time
+                n_records = sink.frames_written if sink else len(state.buffer)
+
+            # 가장 최근 분석 결과를 오버레이 (분석은 추론 워커가 비동기로 수행)
             top_emo = "none"
-            probs = np.zeros(8)
-            
-            if faces is not None:
-                if isinstance(faces, torch.Tensor) and faces.ndim == 4:
-                    face_np = faces[0].permute(1, 2, 0).cpu().numpy()
-                    face_np = (face_np * 128 + 127.5).clip(0, 255).astype(np.uint8)
-                    _, scores = self.rec.predict_emotions([face_np], logits=False)
-                    probs = np.array(scores)[0]
-                    top_emo = self.emotion_labels[np.argmax(probs)]
+            if latest is not None:
+                pose_landmarks, top_emo = latest
+                if pose_landmarks is not None:
+                    if self.mp_drawing is not None:
+                        self.mp_drawing.draw_landmarks(monitor_frame, pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+                    else:
+                        draw_pose_landmarks(monitor_frame, pose_landmarks)
             
             # Monitor 창에 감정 상태 표시 (작게)
+            if self.capture_only:
+                top_emo = "(capture-only)"
             cv2.putText(monitor_frame, f"Emo: {top_emo}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
             # --- 2. Stimulus Window (텍스트 화면) ---
-            stimulus_frame = self.create_stimulus_image(width=900, height=600)
-            
+            # 화면은 미리 래스터화된 캐시 이미지를 그대로 사용 (프레임마다 PIL 변환 없음)
             if not is_recording:
                 # [대기 모드 UI]
-                stimulus_frame = self.put_korean_text(stimulus_frame, "실험 대기 중 (STANDBY)", (300, 250), 30, (0, 255, 255))
-                stimulus_frame = self.put_korean_text(stimulus_frame, "준비가 되셨으면 [Enter]를 눌러주세요.", (280, 300), 20, (255, 255, 255))
+                stimulus_frame = standby_screen
                 
                 # Monitor 창에도 표시
                 cv2.putText(monitor_frame, "STANDBY - Press Enter", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
                 
             else:
-                # [녹화 모드 UI] - 여기에 텍스트를 예쁘게 뿌림
-                curr_time = time.time()
-                t_elapsed = curr_time - start_time
-                fps = 1.0 / (0.001 + (t_elapsed / (len(records)+1)))
+                # [녹화 모드 UI]
+                stimulus_frame = recording_screen
 
-                # 1) 제목
-                stimulus_frame = self.put_korean_text(stimulus_frame, title_text, (50, 50), 35, (255, 255, 255))
-                
-                # 2) 구분선 (그냥 텍스트로 대체하거나 cv2.line 사용)
-                cv2.line(stimulus_frame, (50, 100), (850, 100), (100, 100, 100), 2)
-
-                # 3) 요약문 출력 (줄바꿈)
-                y_pos = 130
-                chunk_size = 35 # 한 줄 글자 수
-                for i in range(0, len(summary_text), chunk_size):
-                    line = summary_text[i:i+chunk_size]
-                    stimulus_frame = self.put_korean_text(stimulus_frame, line, (50, y_pos), 25, (220, 220, 220))
-                    y_pos += 40
-                
-                # 4) Buying Point (강조)
-                if buying_point:
-                    y_pos += 20
-                    stimulus_frame = self.put_korean_text(stimulus_frame, "★ 핵심 포인트:", (50, y_pos), 25, (100, 255, 100))
-                    y_pos += 40
-                    # buying point 줄바꿈
-                    for i in range(0, len(buying_point), chunk_size):
-                        line = buying_point[i:i+chunk_size]
-                        stimulus_frame = self.put_korean_text(stimulus_frame, line, (50, y_pos), 25, (100, 255, 100))
-                        y_pos += 40
-
-                # 5) 하단 안내
-                stimulus_frame = self.put_korean_text(stimulus_frame, "다 읽으셨으면 [Space]를 눌러 종료하세요.", (250, 550), 20, (100, 100, 255))
-
-                # Monitor 창에 녹화 중 표시
+                # Monitor 창에 녹화 중 표시 + 캡처/분석 fps 분리 표시
+                elapsed = 0.001 + (time.time() - start_time)
                 cv2.circle(monitor_frame, (30, 60), 10, (0, 0, 255), -1)
                 cv2.putText(monitor_frame, "REC", (50, 65), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                cv2.putText(monitor_frame, f"cap {(stream.frame_count - state.start_index) / elapsed:.1f} fps / "
+                            f"ana {n_records / elapsed:.1f} fps",
+                            (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
 
-                # 데이터 수집
-                row = {
-                    "t": t_elapsed,
-                    "fps": fps,
-                    "top_emotion": top_emo
-                }
-                for i, label in enumerate(self.emotion_labels):
-                    row[f"prob_{label}"] = probs[i] * 100
-                
-                # Pose Data Filling
-                row["nose_x"] = -999; row["nose_y"] = -999; row["nose_vis"] = 0
-                row["left_shoulder_z"] = -999; row["left_shoulder_vis"] = 0
-                row["right_shoulder_z"] = -999; row["right_shoulder_vis"] = 0
-
-                if pose_landmarks:
-                    row["nose_x"] = pose_landmarks[0].x
-                    row["nose_y"] = pose_landmarks[0].y
-                    row["nose_vis"] = pose_landmarks[0].visibility
-
-                    row["left_shoulder_z"] = pose_landmarks[11].z
-                    row["left_shoulder_vis"] = pose_landmarks[11].visibility
-                    
-                    row["right_shoulder_z"] = pose_landmarks[12].z
-                    row["right_shoulder_vis"] = pose_landmarks[12].visibility
-
-                records.append(row)
+            # 단계별 지연 라이브 오버레이 (최근 프레임 평균)
+            if SHOW_TIMING_OVERLAY:
+                for j, line in enumerate(self.timer.overlay_lines()):
+                    cv2.putText(monitor_frame, line, (10, 125 + j * 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+            self.timer.record("ui_compose", time.perf_counter() - t_ui)
 
             # --- 화면 출력 ---
+            t_display = time.perf_counter()
             cv2.imshow("Monitor (Webcam)", monitor_frame)
             cv2.imshow("Stimulus (Text)", stimulus_frame)
             
@@ -199,34 +430,95 @@ class BehaviorRecorder:
                 windows_positioned = True
 
             key = cv2.waitKey(1) & 0xFF
+            self.timer.record("display", time.perf_counter() - t_display)
             
             if not is_recording:
                 if key == 13: # Enter
-                    is_recording = True
-                    start_time = time.time()
+                    if not sink:
+                        # 프레임 로그는 녹화하면서 chunk 단위로 바로 디스크에 기록
+                        state.writer = FrameLogWriter(filename, self.csv_fieldnames, fmt=LOG_FORMAT, timer=self.timer)
+                    with state.lock:
+                        state.recording = True
+                        state.start_time = time.time()
+                        state.start_index = stream.frame_count
+                    if sink:
+                        sink.start_recording(state.start_time)
                     print(f"[REC] Started recording.")
                 elif key == ord('q'):
                     print("[STOP] Quit by user")
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    return None
+                    quit_by_user = True
+                    break
             else:
                 if key == 32: # Space
                     print("[STOP] Finished recording.")
                     break
+                elif key == ord('q'):
+                    print("[STOP] Quit by user (recording aborted)")
+                    quit_by_user = True
+                    break
         
-        cap.release()
+        # 파이프라인 종료 (추론 워커가 마지막 프레임 처리를 끝낼 때까지 대기)
+        state.stop_event.set()
+        stream.stop()
+        if worker is not None:
+            worker.join(timeout=5.0)
+            if worker.is_alive():
+                # 추론이 느려도 writer/buffer를 닫기 전에 워커가 끝나야 함 (마지막 배치 flush 포함)
+                print("[WARN] Inference worker is still processing the last frames. Waiting...")
+                worker.join()
         cv2.destroyAllWindows()
-        
-        self.save_csv(filename, records)
-        return filename
 
-    def save_csv(self, filename, records):
-        if not records: 
+        if sink:
+            video_path = sink.finish()
+            if quit_by_user:
+                return None
+            if video_path:
+                self.save_capture_meta(video_path, option_data, session_id)
+                print(f"[SAVE] Video saved to {video_path} ({sink.frames_written} frames, "
+                      f"dropped {sink.dropped} while encoding)")
+            return video_path
+
+        if state.writer is None:
+            # 녹화를 시작하기 전에 종료됨
+            return None
+
+        rows_written = state.writer.close()
+        if quit_by_user:
+            # 중단된 Trial의 로그도 지워지지 않고 디스크에 남음
+            print(f"[SAVE] Partial log kept at {state.writer.path} ({rows_written} rows)")
+            return None
+
+        elapsed = 0.001 + (time.time() - state.start_time)
+        capture_fps = (stream.frame_count - state.start_index) / elapsed
+        analysis_fps = len(state.buffer) / elapsed
+        print(f"[INFO] capture {capture_fps:.1f} fps, analysis {analysis_fps:.1f} fps "
+              f"(dropped {infer_frames.dropped} frames)")
+
+        timing_path = self.timer.write_sidecar(os.path.splitext(filename)[0] + "_timing.json", extra={
+            "session_id": session_id,
+            "option_id": option_data['id'],
+            "frames": len(state.buffer),
+            "duration_sec": round(elapsed, 3),
+            "capture_fps": round(capture_fps, 2),
+            "analysis_fps": round(analysis_fps, 2),
+            "dropped_frames": infer_frames.dropped
+        })
+        print(f"[SAVE] Stage timing saved to {timing_path}")
+
+        if not rows_written:
             print("[WARN] No records to save.")
-            return
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=self.csv_fieldnames)
-            writer.writeheader()
-            writer.writerows(records)
-        print(f"[SAVE] Log saved to {filename}")
\ No newline at end of file
+        else:
+            print(f"[SAVE] Log saved to {state.writer.path} ({rows_written} rows)")
+
+        # 전처리기가 로그를 다시 읽지 않도록 메모리상의 프레임을 그대로 넘겨줄 수 있게 보관
+        self.last_frames = state.buffer.to_dataframe()
+        # 특징은 녹화 중에 이미 계산됨 -> Space를 누르면 바로 Seed 생성 가능
+        # (FFT/초 단위 궤적 같은 시계열 특징은 Seed 생성 시 last_frames에서 계산 -> 백그라운드 처리 가능)
+        self.last_metrics = state.features.metrics() if rows_written else None
+        return state.writer.path
+
+    def save_capture_meta(self, video_path, option_data, session_id):
+        """오프라인 분석 후 Seed를 만들 수 있도록 선택지 정보를 영상 옆에 저장"""
+        meta_path = os.path.splitext(video_path)[0] + "_meta.json"
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"session_id": session_id, "option": option_data}, f, ensure_ascii=False, indent=2)
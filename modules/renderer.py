@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+@lru_cache(maxsize=None)
+def load_font(font_size):
+    """한글 폰트 로드 (크기별로 한 번만 디스크에서 읽음)"""
+    try:
+        return ImageFont.truetype("malgun.ttf", font_size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+# MediaPipe Pose 33개 landmark 연결 (mediapipe.solutions.pose.POSE_CONNECTIONS와 동일)
+POSE_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32)
+]
+
+
+def draw_pose_landmarks(image, pose_landmarks, min_visibility=0.5):
+    """
+    mediapipe drawing_utils 없이 cv2로 Pose 골격을 그립니다.
+    (추론 서버에 연결된 클라이언트는 mediapipe를 import하지 않으므로 이 함수로 오버레이)
+    """
+    h, w = image.shape[:2]
+    points = [(int(lm.x * w), int(lm.y * h)) if lm.visibility >= min_visibility else None
+              for lm in pose_landmarks.landmark]
+    for a, b in POSE_CONNECTIONS:
+        if a < len(points) and b < len(points) and points[a] and points[b]:
+            cv2.line(image, points[a], points[b], (224, 224, 224), 2)
+    for p in points:
+        if p:
+            cv2.circle(image, p, 3, (0, 0, 255), -1)
+
+
+def wrap_text(text, chunk_size=35):
+    """한 줄 chunk_size 글자 단위 줄바꿈"""
+    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+
+
+class StimulusRenderer:
+    """
+    Stimulus 창 화면(대기/녹화)을 선택지마다 한 번만 레이아웃 & 래스터화해서 캐싱합니다.
+    녹화 루프에서는 캐시된 BGR 이미지를 그대로 보여주기만 하면 됩니다.
+    """
+    def __init__(self, width=900, height=600, chunk_size=35):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self._standby = None
+        self._cache = {}
+
+    def _draw(self, items):
+        """(text, pos, font_size, color) 목록을 한 장의 PIL 이미지에 그린 뒤 BGR로 한 번만 변환"""
+        img_pil = Image.new("RGB", (self.width, self.height), (0, 0, 0))
+        draw = ImageDraw.Draw(img_pil)
+        for item in items:
+            if item[0] == "line":
+                _, start, end, color, thickness = item
+                draw.line([start, end], fill=color, width=thickness)
+            else:
+                text, pos, font_size, color = item
+                draw.text(pos, text, font=load_font(font_size), fill=color)
+        return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
+
+    def standby_screen(self):
+        if self._standby is None:
+            self._standby = self._draw([
+                ("실험 대기 중 (STANDBY)", (300, 250), 30, (0, 255, 255)),
+                ("준비가 되셨으면 [Enter]를 눌러주세요.", (280, 300), 20, (255, 255, 255)),
+            ])
+        return self._standby
+
+    def recording_screen(self, option_data):
+        key = (option_data.get('id'), option_data.get('title', 'Option'),
+               option_data.get('summary', ''), option_data.get('buying_point', ''))
+        if key in self._cache:
+            return self._cache[key]
+
+        _, title, summary_text, buying_point = key
+        items = [
+            # 1) 제목
+            (f"주제: {title}", (50, 50), 35, (255, 255, 255)),
+            # 2) 구분선
+            ("line", (50, 100), (850, 100), (100, 100, 100), 2),
+        ]
+
+        # 3) 요약문 출력 (줄바꿈)
+        y_pos = 130
+        for line in wrap_text(summary_text, self.chunk_size):
+            items.append((line, (50, y_pos), 25, (220, 220, 220)))
+            y_pos += 40
+
+        # 4) Buying Point (강조)
+        if buying_point:
+            y_pos += 20
+            items.append(("★ 핵심 포인트:", (50, y_pos), 25, (100, 255, 100)))
+            y_pos += 40
+            for line in wrap_text(buying_point, self.chunk_size):
+                items.append((line, (50, y_pos), 25, (100, 255, 100)))
+                y_pos += 40
+
+        # 5) 하단 안내
+        items.append(("다 읽으셨으면 [Space]를 눌러 종료하세요.", (250, 550), 20, (100, 100, 255)))
+
+        screen = self._draw(items)
+        self._cache[key] = screen
+        return screen
@@ -0,0 +1,163 @@
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import DATA_DIR, LOG_DIR, SEED_DIR
+from modules.cache import file_sha256
+from modules.preprocessor import FEATURE_VERSION, LABEL_FIELDS, feature_cache, process_csv_to_json
+
+# data/logs/{session}_{opt}_{HHMMSS}.csv
+LOG_NAME_PATTERN = re.compile(r"^(?P<session>[^_]+)_(?P<opt>.+)_(?P<time>\d{6})\.csv$")
+# 예전 녹화기의 wide 로그: data/logs/emotion_log_{YYYY-MM-DD_HH-MM-SS}.csv (세션/선택지 정보 없음)
+WIDE_LOG_PATTERN = re.compile(r"^emotion_log_(?P<date>\d{4}-\d{2}-\d{2})_(?P<time>\d{2}-\d{2}-\d{2})\.csv$")
+WIDE_LOG_OPTION_ID = "log"
+
+# 이미 처리한 로그의 해시/특징 버전 기록 (seeds 폴더 밖에 두어 *.json glob에 섞이지 않도록)
+MANIFEST_PATH = os.path.join(DATA_DIR, "reprocess_manifest.json")
+
+
+def seed_path_for(session_id, option_id):
+    return os.path.join(SEED_DIR, f"seed_{session_id}_{option_id}.json")
+
+
+def discover_logs(log_dir=LOG_DIR):
+    """
+    세션/선택지별 로그를 찾습니다. 같은 선택지를 다시 녹화한 경우 Seed 파일명이 같으므로
+    가장 나중(HHMMSS) 로그 하나만 사용합니다. 예전 emotion_log_*.csv도 포함됩니다.
+    Returns: [(csv_path, session_id, option_id), ...]
+    """
+    latest = {}
+    for path in glob.glob(os.path.join(log_dir, "*.csv")):
+        name = os.path.basename(path)
+        wide = WIDE_LOG_PATTERN.match(name)
+        if wide:
+            # 로그 하나 = 세션 하나 (세션 ID는 기록 시각, '_' 없이)
+            session = "log" + (wide.group("date") + wide.group("time")).replace("-", "")
+            latest[(session, WIDE_LOG_OPTION_ID)] = ("", path)
+            continue
+        m = LOG_NAME_PATTERN.match(name)
+        if not m:
+            continue
+        key = (m.group("session"), m.group("opt"))
+        if key not in latest or m.group("time") > latest[key][0]:
+            latest[key] = (m.group("time"), path)
+    return sorted((path, session, opt) for (session, opt), (_, path) in latest.items())
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _existing_seed_inputs(session_id, option_id):
+    """기존 Seed에서 선택지 정보(option_data)와 사람이 단 라벨을 복원"""
+    option_data = {"id": option_id}
+    labels = {}
+    path = seed_path_for(session_id, option_id)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            seed = json.load(f)
+        option_data.update(seed.get("stimulus_content", {}))
+        option_data["user_context"] = seed.get("meta", {}).get("user_context", "Unknown Context")
+        labels = {k: seed[k] for k in LABEL_FIELDS if seed.get(k) is not None}
+    return option_data, labels
+
+
+def _reprocess_one(csv_path, session_id, option_id):
+    """프로세스 풀 작업 단위. Returns: (csv_path, seed_path or None, rows, seconds, 특징 캐시 hit 여부)"""
+    t0 = time.perf_counter()
+    cache = feature_cache()
+    hits_before = cache.hits if cache is not None else 0
+    option_data, labels = _existing_seed_inputs(session_id, option_id)
+    seed_path = process_csv_to_json(csv_path, option_data, session_id, labels=labels)
+    cache_hit = cache is not None and cache.hits > hits_before
+
+    rows = 0
+    if seed_path:
+        with open(csv_path, "rb") as f:
+            rows = max(sum(1 for _ in f) - 1, 0)
+    return csv_path, seed_path, rows, time.perf_counter() - t0, cache_hit
+
+
+def reprocess_logs(workers=None, force=False, dry_run=False, log_dir=LOG_DIR, create_missing=False):
+    """
+    data/logs의 로그를 다시 전처리해 data/seeds를 갱신합니다.
+    내용 해시와 FEATURE_VERSION이 manifest와 같고 Seed가 남아 있으면 건너뜁니다.
+    Seed가 없는 로그(중단된 Trial, 예전 wide 로그 등)는 선택지 정보가 없으므로
+    create_missing=True일 때만 새 Seed를 만듭니다. (아니면 stage3에 빈 선택지가 섞임)
+    """
+    manifest = load_manifest()
+    logs = discover_logs(log_dir)
+
+    if not create_missing:
+        without_seed = [log for log in logs if not os.path.exists(seed_path_for(log[1], log[2]))]
+        if without_seed:
+            print(f"[REPROCESS] Skipping {len(without_seed)} logs without an existing seed "
+                  f"(use --create-missing to create them)")
+        logs = [log for log in logs if log not in without_seed]
+
+    todo = []
+    hashes = {}
+    for csv_path, session_id, option_id in logs:
+        name = os.path.basename(csv_path)
+        digest = file_sha256(csv_path)
+        hashes[name] = digest
+        entry = manifest.get(name)
+        up_to_date = (
+            entry is not None
+            and entry.get("sha256") == digest
+            and entry.get("feature_version") == FEATURE_VERSION
+            # 처리 불가(컬럼 누락 등)로 기록된 로그는 내용이 바뀔 때까지 다시 시도하지 않음
+            and (entry.get("seed") is None or os.path.exists(seed_path_for(session_id, option_id)))
+        )
+        if force or not up_to_date:
+            todo.append((csv_path, session_id, option_id))
+
+    print(f"[REPROCESS] {len(logs)} logs found, {len(todo)} to process "
+          f"({len(logs) - len(todo)} unchanged, feature v{FEATURE_VERSION})")
+    if dry_run or not todo:
+        for csv_path, _, _ in todo:
+            print(f"   -> {os.path.basename(csv_path)}")
+        return []
+
+    results = []
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_reprocess_one, *job) for job in todo]
+        for future in as_completed(futures):
+            try:
+                csv_path, seed_path, rows, seconds, cache_hit = future.result()
+            except Exception as e:
+                print(f"[ERR] Reprocess failed: {e}")
+                continue
+            results.append((csv_path, seed_path, rows, seconds, cache_hit))
+
+            name = os.path.basename(csv_path)
+            manifest[name] = {
+                "sha256": hashes[name],
+                "feature_version": FEATURE_VERSION,
+                "seed": os.path.basename(seed_path) if seed_path else None
+            }
+    save_manifest(manifest)
+
+    wall = time.perf_counter() - wall_start
+    ok = [r for r in results if r[1]]
+    rows = sum(r[2] for r in ok)
+    cpu = sum(r[3] for r in results)
+    print(f"[REPROCESS] {len(ok)}/{len(todo)} seeds written in {wall:.2f}s "
+          f"({len(ok) / (wall + 1e-9):.1f} files/s, {rows / (wall + 1e-9):.0f} rows/s, "
+          f"parallel speedup x{cpu / (wall + 1e-9):.1f}, "
+          f"feature cache hits {sum(r[4] for r in results)}/{len(results)})")
+    return results
@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.preprocessor import process_csv_to_json
+
+# Trial이 끝날 때마다 Seed 생성(process_csv_to_json)을 백그라운드 스레드에 맡겨
+# 다음 Trial 녹화와 겹치게 합니다. 호출부는 판결(judge.evaluate_session) 전에 wait_for_session()으로 기다려야 합니다.
+
+_executor = None
+_pending = defaultdict(list)  # session_id -> [(선택지 제목, future), ...]
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Seed 파일은 순서대로, 녹화 스레드와 CPU를 덜 다투도록 worker 하나
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seed-worker")
+        return _executor
+
+
+def _make_seed(csv_path, option_data, session_id, frames, metrics):
+    json_path = process_csv_to_json(csv_path, option_data, session_id, frames=frames, metrics=metrics)
+    if json_path is None:
+        raise ValueError(f"유효한 데이터가 생성되지 않았습니다 (너무 짧음 등): {os.path.basename(csv_path)}")
+    return json_path
+
+
+def _report(title, future):
+    error = future.exception()
+    if error is not None:
+        print(f"   -> [SEED ERROR] {title}: {error}")
+    else:
+        print(f"   -> [SEED] {title}: {os.path.basename(future.result())}")
+
+
+def submit_seed(csv_path, option_data, session_id, frames=None, metrics=None):
+    """
+    Seed 생성을 백그라운드에 등록하고 바로 반환합니다. Returns: Future (결과는 Seed 경로)
+    frames/metrics는 녹화기가 세션마다 새로 만드는 객체이므로 다음 녹화가 시작돼도 안전합니다.
+    """
+    title = option_data.get("title", option_data.get("id", "opt"))
+    future = _get_executor().submit(_make_seed, csv_path, option_data, session_id, frames, metrics)
+    future.add_done_callback(lambda f: _report(title, f))
+    with _lock:
+        _pending[session_id].append((title, future))
+    return future
+
+
+def wait_for_session(session_id, timeout=None):
+    """
+    session_id로 등록된 Seed 생성이 모두 끝날 때까지 기다립니다.
+    Returns: (생성된 Seed 경로 목록, 실패한 선택지 제목 목록)
+    """
+    with _lock:
+        futures = _pending.pop(session_id, [])
+    if not futures:
+        return [], []
+
+    unfinished = sum(1 for _, f in futures if not f.done())
+    if unfinished:
+        print(f"[INFO] Waiting for {unfinished} pending seed(s) of session {session_id}...")
+
+    paths, failed = [], []
+    for title, future in futures:
+        try:
+            paths.append(future.result(timeout=timeout))
+        except Exception:
+            failed.append(title)
+    if failed:
+        print(f"[WARN] Session {session_id}: {len(failed)} seed(s) failed: {', '.join(failed)}")
+    return paths, failed
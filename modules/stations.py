@@ -0,0 +1,297 @@
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from config import LOG_DIR, LOG_FORMAT, FACE_DETECT_INTERVAL
+from modules.log_writer import FrameLogWriter
+
+Landmark = namedtuple("Landmark", ["x", "y", "z", "visibility"])
+
+
+# ---------------------------------------------------------
+# 1. Inference worker process (프로세스마다 모델을 한 번만 로드)
+# ---------------------------------------------------------
+# 각 스테이션은 항상 같은 단일 프로세스 worker에 배정되므로, 한 스테이션의 프레임은
+# 한 프로세스에서 요청 순서대로 처리되고 얼굴 추적기/Pose tracking 상태도 하나만 존재합니다.
+# (스테이션 수가 worker 수보다 많으면 한 worker가 여러 스테이션을 맡되, 상태는 스테이션별로 분리)
+
+_worker = None
+_shm_cache = {}
+_station_state = {}
+WORKER_TIMER_SAMPLES = 10000  # worker 프로세스의 단계별 지연 샘플 상한 (스테이션이 모두 끝나면 초기화)
+
+
+def _init_worker():
+    global _worker
+    from modules.recorder import BehaviorRecorder
+    from modules.profiler import StageTimer
+    _worker = BehaviorRecorder(capture_only=False, use_server=False, target_fps=None)
+    _worker.timer = StageTimer(max_samples=WORKER_TIMER_SAMPLES)
+
+
+def _station_trackers(station_id):
+    """스테이션별 얼굴 추적기 / Pose 인스턴스 (프레임 간 tracking 상태가 섞이지 않도록)"""
+    if station_id not in _station_state:
+        from modules.face_tracker import FaceTracker
+        pose = None
+        if _worker.pose:
+            pose = _worker.mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=1,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        tracker = FaceTracker(_worker._detect_faces, detect_interval=FACE_DETECT_INTERVAL)
+        _station_state[station_id] = (tracker, pose)
+    return _station_state[station_id]
+
+
+def _analyze_shared_frame(station_id, shm_name, n_slots, shape, slot):
+    """공유 메모리 슬롯의 프레임을 분석. Returns: (pose landmarks 리스트 or None, 감정 probs or None)"""
+    shm = _shm_cache.get(shm_name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _shm_cache[shm_name] = shm
+    frames = np.ndarray((n_slots,) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+    frame_rgb = cv2.cvtColor(frames[slot], cv2.COLOR_BGR2RGB)  # 복사본 -> 슬롯은 바로 재사용 가능
+
+    tracker, pose = _station_trackers(station_id)
+    pose_landmarks, face_crop = _worker.analyze_frame(frame_rgb, tracker=tracker, pose=pose)
+
+    points = None
+    if pose_landmarks is not None:
+        points = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark]
+    probs = _worker.predict_emotions([face_crop])[0] if face_crop is not None else None
+    return points, probs
+
+
+def _release_station(station_id, shm_name):
+    """스테이션이 끝나면 worker 쪽 공유 메모리 연결/추적 상태를 정리 (unlink는 스테이션 쪽에서)"""
+    shm = _shm_cache.pop(shm_name, None)
+    if shm is not None:
+        shm.close()
+    state = _station_state.pop(station_id, None)
+    if state is not None and state[1] is not None:
+        state[1].close()  # 스테이션 전용 mediapipe Pose
+    if not _station_state:
+        _worker.timer.reset()
+
+
+# ---------------------------------------------------------
+# 2. Station (캡처 소스 하나 = 독립된 세션/로그)
+# ---------------------------------------------------------
+
+class Station:
+    """
+    웹캠 또는 영상 파일 하나를 맡는 녹화 스테이션.
+    캡처 스레드가 프레임을 공유 메모리 슬롯에 쓰고 배정된 추론 프로세스에 분석을 요청하며,
+    수집 스레드가 결과를 요청 순서대로 받아 스테이션 전용 로그에 기록합니다.
+    """
+    def __init__(self, station_id, source, session_id, option_data, schema, worker, slots=4, duration=None):
+        self.station_id = station_id
+        self.source = source
+        self.session_id = session_id
+        self.option_data = option_data
+        self.schema = schema          # 모델 없이 로그 스키마/기록 로직만 쓰는 BehaviorRecorder(capture_only=True)
+        self.worker = worker          # 이 스테이션 전용 단일 프로세스 executor (프레임 순서 보장)
+        self.duration = duration
+        self.is_file = isinstance(source, str)
+
+        self.cap = cv2.VideoCapture(source)
+        ok, first = self.cap.read()
+        if not ok:
+            self.cap.release()
+            raise RuntimeError(f"Cannot read from source: {source}")
+        self._first = first
+        self.shape = first.shape
+        self.file_fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        self.n_slots = slots
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(self.shape)))
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.free_slots = queue.Queue()
+        for k in range(slots):
+            self.free_slots.put(k)
+
+        base_name = f"{session_id}_{option_data['id']}_{datetime.now().strftime('%H%M%S')}"
+        self.buffer = schema.new_frame_buffer()
+        self.writer = FrameLogWriter(os.path.join(LOG_DIR, f"{base_name}.csv"), schema.csv_fieldnames, fmt=LOG_FORMAT)
+
+        self.pending = queue.Queue()   # (future, slot, t, 캡처된 프레임 수) 요청 순서 유지
+        self.written = 0               # 로그 writer로 넘긴 행 수
+        self.captured = 0
+        self.dropped = 0
+        self.stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.start_time = time.time()
+        for target, name in ((self._capture_loop, "capture"), (self._collect_loop, "collect")):
+            th = threading.Thread(target=target, name=f"Station{self.station_id}-{name}", daemon=True)
+            th.start()
+            self._threads.append(th)
+        return self
+
+    def _capture_loop(self):
+        image = self._first
+        idx = 0
+        while not self.stop_event.is_set():
+            if image is None:
+                ret, image = self.cap.read()
+                if not ret:
+                    break
+
+            # 영상 파일은 원본 타임라인, 웹캠은 캡처 시각 기준
+            t = idx / self.file_fps if self.is_file else time.time() - self.start_time
+            if self.duration and t >= self.duration:
+                break
+            self.captured += 1
+            idx += 1
+
+            # 영상 파일은 빠짐없이 분석 (슬롯이 빌 때까지 대기), 웹캠은 밀리면 드롭
+            slot = self._next_slot()
+            if slot is None:
+                if self.is_file:
+                    break  # 대기 중 stop
+                self.dropped += 1
+                image = None
+                continue
+
+            self.frames[slot] = image
+            future = self.worker.submit(_analyze_shared_frame, self.station_id, self.shm.name,
+                                        self.n_slots, self.shape, slot)
+            self.pending.put((future, slot, t, self.captured))
+            image = None
+
+        self.pending.put(None)
+
+    def _next_slot(self):
+        if not self.is_file:
+            try:
+                return self.free_slots.get_nowait()
+            except queue.Empty:
+                return None
+        while not self.stop_event.is_set():
+            try:
+                return self.free_slots.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def _collect_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            future, slot, t, captured = item
+            try:
+                points, probs = future.result()
+            except Exception as e:
+                print(f"[Station {self.station_id}] Inference failed: {e}")
+                continue
+            finally:
+                self.free_slots.put(slot)
+
+            # recorder / offline_analyzer와 같은 의미: 세션 타임라인(t) 기준 분석/캡처 샘플링 레이트
+            # (영상 파일은 원본 타임라인이므로 처리 속도와 무관)
+            fps = 1.0 / (0.001 + (t / (len(self.buffer) + 1)))
+            capture_fps = captured / (0.001 + t)
+            pose_landmarks = SimpleNamespace(landmark=[Landmark(*p) for p in points]) if points else None
+            i = self.schema.record_frame(self.buffer, t, fps, capture_fps, pose_landmarks)
+            if probs is not None:
+                self.buffer.set_probs(i, probs)
+
+            # chunk 단위로만 DataFrame을 만들어 writer로 넘김 (프레임마다 할당하지 않음)
+            if len(self.buffer) - self.written >= self.writer.chunk_size:
+                self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self):
+        stop = len(self.buffer)
+        if stop > self.written:
+            self.writer.write_frames(self.buffer.to_dataframe(self.written, stop))
+            self.written = stop
+
+    def wait(self):
+        for th in self._threads:
+            th.join()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def finish(self):
+        """스레드 종료 대기 -> 로그 fsync -> 공유 메모리 해제. 로그 경로 반환(없으면 None)."""
+        self.wait()
+        self.cap.release()
+        rows = self.writer.close()
+        try:
+            # worker도 이 스테이션의 공유 메모리 연결을 닫아야 메모리가 실제로 해제됨
+            self.worker.submit(_release_station, self.station_id, self.shm.name).result()
+        except Exception as e:
+            print(f"[WARN] Station {self.station_id}: worker cleanup failed: {e}")
+        self.shm.close()
+        self.shm.unlink()
+        return self.writer.path if rows else None
+
+
+# ---------------------------------------------------------
+# 3. Supervisor
+# ---------------------------------------------------------
+
+def run_stations(station_specs, workers=None, slots=4, duration=None):
+    """
+    station_specs: [{"source": 0 또는 "video.mp4", "session_id": ..., "option": {...}}, ...]
+    모든 스테이션을 동시에 돌리고, 스테이션별 (log_path, spec, frames DataFrame) 목록을 반환합니다.
+    """
+    from modules.recorder import BehaviorRecorder
+    schema = BehaviorRecorder(capture_only=True)
+
+    # 스테이션보다 많은 worker는 쓸 일이 없음 (스테이션 하나는 항상 한 worker에서 순서대로 처리)
+    workers = min(workers or max(1, (os.cpu_count() or 2) - 1), max(1, len(station_specs)))
+    print(f"[SUPERVISOR] {len(station_specs)} stations, {workers} inference workers")
+
+    results = []
+    wall_start = time.time()
+    # worker마다 프로세스 하나짜리 executor: 제출 순서대로 한 프로세스에서 실행됨
+    pools = [ProcessPoolExecutor(max_workers=1, initializer=_init_worker) for _ in range(workers)]
+    try:
+        stations = []
+        for k, spec in enumerate(station_specs):
+            try:
+                station = Station(k, spec["source"], spec["session_id"], spec["option"], schema,
+                                  pools[k % workers], slots=slots, duration=duration)
+            except RuntimeError as e:
+                print(f"[ERROR] Station {k}: {e}")
+                continue
+            stations.append((station.start(), spec))
+
+        try:
+            for station, _ in stations:
+                station.wait()
+        except KeyboardInterrupt:
+            print("\n[STOP] Stopping all stations...")
+            for station, _ in stations:
+                station.stop()
+
+        for station, spec in stations:
+            log_path = station.finish()
+            print(f"[Station {station.station_id}] {len(station.buffer)} frames analyzed, "
+                  f"{station.dropped} dropped -> {log_path}")
+            results.append((log_path, spec, station.buffer.to_dataframe()))
+    finally:
+        for pool in pools:
+            pool.shutdown()
+
+    wall = time.time() - wall_start
+    total = sum(len(df) for _, _, df in results)
+    print(f"[SUPERVISOR] {total} frames in {wall:.1f}s ({total / (wall + 0.001):.1f} fps aggregate)")
+    return results
@@ -1,9 +1,6 @@
 import json
 import re
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL_NAME
-
-genai.configure(api_key=GEMINI_API_KEY)
+from modules import llm_client
 
 # [수정됨] Context-Aware Curator 프롬프트
 SYSTEM_PROMPT = """
@@ -36,17 +33,17 @@ RULES:
 - Always prioritize the User's Context over general facts.
 """
 
-def generate_explanations(options: list, context: str) -> dict:
-    """
-    선택지 목록 + 사용자 상황(Context)을 받아 맞춤형 설명을 생성합니다.
-    """
-    if not options:
-        return {}
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "temperature": 0.7,
+    "max_output_tokens": 4096
+}
 
+def _build_prompt(options, context):
     options_block = "\n".join([f"{i+1}. {opt}" for i, opt in enumerate(options)])
     
     # [수정됨] 프롬프트에 Context 주입
-    user_prompt = f"""
+    return f"""
     [User's Context / Situation]
     "{context}"
 
@@ -55,20 +52,22 @@ def generate_explanations(options: list, context: str) -> dict:
     
     Analyze these options to help the user decide in their current situation.
     """
-    
-    model = genai.GenerativeModel(
-        model_name=GEMINI_MODEL_NAME, 
-        system_instruction=SYSTEM_PROMPT
-    )
+
+def generate_explanations(options: list, context: str) -> dict:
+    """
+    선택지 목록 + 사용자 상황(Context)을 받아 맞춤형 설명을 생성합니다.
+    """
+    if not options:
+        return {}
+
+    user_prompt = _build_prompt(options, context)
     
     try:
-        response = model.generate_content(
-            user_prompt, 
-            generation_config={
-                "response_mime_type": "application/json",
-                "temperature": 0.7,
-                "max_output_tokens": 4096
-            }
+        response = llm_client.generate(
+            "stimulus",
+            user_prompt,
+            system_instruction=SYSTEM_PROMPT,
+            generation_config=GENERATION_CONFIG
         )
         text = response.text.strip()
         
@@ -79,4 +78,54 @@ def generate_explanations(options: list, context: str) -> dict:
     
     except Exception as e:
         print(f"[LLM Error] {e}")
-        return {"options": []}
\ No newline at end of file
+        return {"options": []}
+
+class OptionStreamParser:
+    """
+    스트리밍으로 들어오는 {"options": [ {...}, {...} ]} 응답에서
+    닫는 괄호까지 도착한 option 객체를 하나씩 꺼냅니다. (```json 코드 블록으로 감싸져 있어도 동작)
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.pos = None  # options 배열 안에서 다음 객체를 찾을 위치
+        self.decoder = json.JSONDecoder()
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self.pos is None:
+            m = re.search(r'"options"\s*:\s*\[', self.buffer)
+            if not m:
+                return []
+            self.pos = m.end()
+
+        parsed = []
+        while True:
+            # 객체 사이의 공백/쉼표 건너뛰기
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n,":
+                self.pos += 1
+            if self.pos >= len(self.buffer) or self.buffer[self.pos] != "{":
+                return parsed  # 아직 안 들어왔거나 배열 끝(])
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                return parsed  # 객체가 아직 다 안 들어옴 -> 다음 chunk에서 다시 시도
+            parsed.append(obj)
+            self.pos = end
+
+def stream_explanations(options: list, context: str):
+    """
+    generate_explanations의 스트리밍 버전. 설명이 완성된 option dict를 응답 순서대로 하나씩 yield하므로,
+    첫 번째 선택지는 나머지 설명이 생성되는 동안 바로 사용할 수 있습니다.
+    실패하면 그때까지 완성된 option만 yield하고 끝납니다.
+    """
+    if not options:
+        return
+
+    parser = OptionStreamParser()
+    try:
+        for chunk in llm_client.stream("stimulus", _build_prompt(options, context),
+                                       system_instruction=SYSTEM_PROMPT, generation_config=GENERATION_CONFIG):
+            for option in parser.feed(chunk):
+                yield option
+    except Exception as e:
+        print(f"[LLM Error] {e}")
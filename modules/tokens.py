@@ -0,0 +1,52 @@
+import math
+
+
+def estimate_tokens(text):
+    """
+    토크나이저 없이 쓰는 대략적인 토큰 수 추정.
+    영문/숫자/기호는 약 4글자당 1토큰, 한글 등 비ASCII 문자는 글자당 약 1토큰으로 계산합니다.
+    (실제보다 약간 크게 잡히도록 올림)
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def batch_by_tokens(texts, budget, separator=""):
+    """
+    순서를 유지한 채 texts를 토큰 합이 budget 이하인 묶음으로 나눕니다.
+    separator: 묶음을 합칠 때 항목 사이에 넣는 문자열 (그 토큰도 예산에 포함)
+    budget보다 큰 항목 하나는 단독 묶음이 됩니다. Returns: [[text, ...], ...]
+    """
+    sep_tokens = estimate_tokens(separator)
+    batches = []
+    current, used = [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and used + sep_tokens + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        used += tokens + (sep_tokens if current else 0)
+        current.append(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def truncate_to_tokens(text, max_tokens, marker="\n...(truncated)"):
+    """
+    text를 추정 토큰 max_tokens 이하로 자릅니다 (잘랐으면 뒤에 marker를 붙임, marker 포함해서 max_tokens 이하).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    room = max_tokens - estimate_tokens(marker)
+    if room <= 0:
+        return ""
+    # 예산 안에 들어가는 가장 긴 앞부분 (앞부분 토큰 수는 길이에 대해 단조 증가 -> 이진 탐색)
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= room:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + marker
@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sys
+import uuid
+
+# 모듈 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.stations import run_stations
+from modules.preprocessor import process_csv_to_json
+
+
+def load_station_specs(args):
+    """--stations JSON 또는 --source 목록으로 스테이션 설정을 만듭니다."""
+    if args.stations:
+        # [{"source": 0, "session_id": "...", "option": {...}}, ...]
+        with open(args.stations, "r", encoding="utf-8") as f:
+            specs = json.load(f)
+    else:
+        specs = [{"source": source} for source in args.source]
+
+    for k, spec in enumerate(specs):
+        source = spec["source"]
+        if isinstance(source, str) and source.isdigit():
+            spec["source"] = int(source)  # 웹캠 번호
+        spec.setdefault("session_id", str(uuid.uuid4())[:8])
+        spec.setdefault("option", {"id": f"station{k}"})
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="여러 캡처 소스(웹캠/영상 파일)를 한 프로세스에서 동시에 녹화·분석합니다.")
+    parser.add_argument("--source", action="append", default=[],
+                        help="웹캠 번호(0, 1, ...) 또는 영상 파일 경로. 여러 번 지정 가능")
+    parser.add_argument("--stations", default=None, help="스테이션 설정 JSON 파일 (source/session_id/option)")
+    parser.add_argument("--workers", type=int, default=None, help="추론 프로세스 수 (기본: CPU 코어 수 - 1, 최대 스테이션 수)")
+    parser.add_argument("--slots", type=int, default=4, help="스테이션별 공유 메모리 프레임 슬롯 수")
+    parser.add_argument("--duration", type=float, default=None, help="스테이션별 녹화 시간(초). 웹캠은 Ctrl+C로도 종료")
+    parser.add_argument("--no-seed", action="store_true", help="CSV 로그만 저장하고 Seed는 만들지 않음")
+    args = parser.parse_args()
+
+    specs = load_station_specs(args)
+    if not specs:
+        parser.print_help()
+        return
+
+    print("==================================================")
+    print("   🎥 CLONE Multi-Station Recorder   ")
+    print("==================================================")
+
+    results = run_stations(specs, workers=args.workers, slots=args.slots, duration=args.duration)
+
+    if args.no_seed:
+        return
+    for log_path, spec, frames in results:
+        if log_path:
+            process_csv_to_json(log_path, spec["option"], spec["session_id"], frames=frames)
+
+
+if __name__ == "__main__":
+    main()
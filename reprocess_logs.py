@@ -0,0 +1,30 @@
+import argparse
+import os
+import sys
+
+# 모듈 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.reprocessor import reprocess_logs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="data/logs의 CSV 로그로 data/seeds를 다시 생성합니다. (변경된 로그만, 병렬 처리)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--force", action="store_true", help="변경 여부와 상관없이 모든 로그를 다시 처리")
+    parser.add_argument("--dry-run", action="store_true", help="처리 대상만 출력하고 종료")
+    parser.add_argument("--create-missing", action="store_true",
+                        help="Seed가 없는 로그(중단된 Trial, 예전 wide 로그 등)도 새 Seed로 생성 (선택지 정보는 비어 있음)")
+    args = parser.parse_args()
+
+    print("==================================================")
+    print("   🔁 CLONE Seed Reprocessing Tool   ")
+    print("==================================================")
+
+    reprocess_logs(workers=args.workers, force=args.force, dry_run=args.dry_run,
+                   create_missing=args.create_missing)
+
+
+if __name__ == "__main__":
+    main()
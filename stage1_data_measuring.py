@@ -8,7 +8,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from modules.stimulus import generate_explanations
 from modules.recorder import BehaviorRecorder
-from modules.preprocessor import process_csv_to_json
+from modules.seed_worker import submit_seed, wait_for_session
+from modules.offline_analyzer import analyze_video
 
 def main():
     print("\n" + "="*50)
@@ -87,6 +88,9 @@ def main():
     print("   2. 다 읽었으면 [Space]를 눌러 종료 및 다음 단계로 이동")
     print("="*50)
 
+    # Capture-only 모드: 녹화 중에는 영상만 저장하고, 분석은 모든 Trial이 끝난 뒤 수행
+    captured_videos = []
+
     for idx, opt in enumerate(options_data):
         print(f"\n[Trial {idx+1}/{len(options_data)}]")
         print(f"주제: {opt['title']}")
@@ -97,17 +101,28 @@ def main():
         
         csv_path = recorder.record_session(opt, session_id)
         
-        if csv_path:
-            # 전처리 및 JSON Seed 생성
-            json_path = process_csv_to_json(csv_path, opt, session_id)
-            if json_path:
-                print(f"   -> [저장 완료] {os.path.basename(json_path)}")
-            else:
-                print("   -> [주의] 데이터가 너무 짧거나(5프레임 미만) 처리 중 오류 발생.")
+        if csv_path and recorder.capture_only:
+            captured_videos.append((csv_path, opt))
+            print(f"   -> [영상 저장 완료] {os.path.basename(csv_path)}")
+        elif csv_path:
+            # 전처리 및 JSON Seed 생성은 백그라운드에서 (다음 Trial 녹화와 동시에 진행)
+            submit_seed(csv_path, opt, session_id, frames=recorder.last_frames, metrics=recorder.last_metrics)
         else:
             print("\n[STOP] 사용자에 의해 실험이 중단되었습니다.")
             break
 
+    if captured_videos:
+        print("\n[Offline] 녹화된 영상을 분석합니다... (모델 로딩 포함)")
+        analyzer = BehaviorRecorder(capture_only=False)
+        for video_path, opt in captured_videos:
+            csv_path = analyze_video(video_path, recorder=analyzer)
+            if csv_path:
+                submit_seed(csv_path, opt, session_id, frames=analyzer.last_frames)
+
+    # 백그라운드 Seed 생성 완료 대기
+    seeds, failed = wait_for_session(session_id)
+    print(f"\n[INFO] Seed {len(seeds)}개 저장 완료" + (f", {len(failed)}개 실패 (너무 짧거나 처리 중 오류)" if failed else ""))
+
     print("\n" + "="*50)
     print("🏁 실험이 모두 종료되었습니다.")
     print(f"데이터 위치: data/seeds/ (Session {session_id})")
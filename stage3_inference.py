@@ -2,12 +2,14 @@ import sys
 import os
 import glob
 import json
+import argparse
 
 # 모듈 경로 추가
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from modules.judge import evaluate_session
-from config import SEED_DIR
+from modules import llm_client
+from modules.judge import evaluate_session, judge_sessions_batch
+from config import SEED_DIR, DATA_DIR, LLM_MAX_CONCURRENCY
 
 def get_available_sessions():
     """data/seeds 폴더를 스캔하여 분석 가능한 세션 ID 목록을 반환"""
@@ -32,7 +34,25 @@ def get_available_sessions():
     sorted_sessions = sorted(sessions.items(), key=lambda x: x[1], reverse=True)
     return [s[0] for s in sorted_sessions]
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="CLONE Stage 3: 세션별 선호 선택지 추론")
+    parser.add_argument("--batch", action="store_true", help="메뉴 없이 여러 세션을 한 번에 판결해 JSONL로 저장")
+    parser.add_argument("--sessions", nargs="*", default=None, help="판결할 Session ID (기본: 전체)")
+    parser.add_argument("--out", default=os.path.join(DATA_DIR, "judgments.jsonl"), help="결과 JSONL 경로")
+    parser.add_argument("--concurrency", type=int, default=LLM_MAX_CONCURRENCY, help="동시에 판결할 세션 수")
+    parser.add_argument("--no-resume", action="store_true", help="이미 판결된 세션도 다시 판결")
+    return parser.parse_args()
+
+def run_batch(args):
+    sessions = args.sessions or sorted(get_available_sessions())
+    if not sessions:
+        print("[WARN] 저장된 실험 데이터가 없습니다 (data/seeds 폴더 비어있음).")
+        return
+    judge_sessions_batch(sessions, args.out, concurrency=args.concurrency, resume=not args.no_resume)
+
 def main():
+    args = parse_args()
+
     print("==================================================")
     print("   ⚖️ CLONE Stage 3: Inference & Recommendation   ")
     print("==================================================")
@@ -43,6 +63,10 @@ def main():
         print("먼저 'stage2_make_guideline.py'를 실행하여 가이드라인을 생성해주세요.")
         return
 
+    if args.batch:
+        run_batch(args)
+        return
+
     while True:
         print("\n" + "-"*40)
         print("[메뉴 선택]")
@@ -103,6 +127,7 @@ def main():
                     print(f"  - [{opt}]: {reason}")
             else:
                 print(f"\n[WARN] 분석 실패. ID '{target_session_id}'에 해당하는 데이터가 없거나 에러가 발생했습니다.")
+            llm_client.print_latency_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
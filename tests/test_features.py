@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import features
+from modules.features import FeatureFrame, compute_registered_features, feature
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """테스트에서 등록한 특징이 전역 FEATURES에 남지 않도록 복사본으로 교체"""
+    monkeypatch.setattr(features, "FEATURES", dict(features.FEATURES))
+    return features.FEATURES
+
+
+def _frames(n=60, fps=30.0, nod_hz=1.0):
+    t = np.arange(n) / fps
+    return pd.DataFrame({
+        "t": t,
+        "nose_x": 0.5 + 0.001 * np.cos(t),
+        "nose_y": 0.5 + 0.02 * np.sin(2 * np.pi * nod_hz * t),
+        "prob_Happiness": np.where(t < 1.0, 0.9, 0.1),
+        "prob_Neutral": np.where(t < 1.0, 0.1, 0.9),
+    })
+
+
+def test_custom_feature_is_computed(registry):
+    @feature("mean_nose_x", inputs=["nose_x"])
+    def mean_nose_x(frame):
+        return float(np.nanmean(frame["nose_x"]))
+
+    result = compute_registered_features(_frames(), names=["mean_nose_x"])
+    assert result["mean_nose_x"] == pytest.approx(0.5, abs=1e-3)
+
+
+def test_feature_skipped_when_input_missing_or_too_short(registry):
+    @feature("needs_gaze", inputs=["gaze_x"])
+    def needs_gaze(frame):
+        raise AssertionError("입력 컬럼이 없으면 호출되면 안 됨")
+
+    @feature("needs_many", inputs=["nose_x"], min_frames=100)
+    def needs_many(frame):
+        raise AssertionError("프레임이 모자라면 호출되면 안 됨")
+
+    assert compute_registered_features(_frames(), names=["needs_gaze", "needs_many"]) == {}
+
+
+def test_wildcard_inputs_match_all_columns(registry):
+    @feature("prob_columns", inputs=["prob_*"])
+    def prob_columns(frame):
+        return frame.match("prob_*")
+
+    result = compute_registered_features(_frames(), names=["prob_columns"])
+    assert result["prob_columns"] == ["prob_Happiness", "prob_Neutral"]
+
+
+def test_only_declared_windows_are_precomputed(registry, monkeypatch):
+    computed = []
+    rolling_mean = FeatureFrame.rolling_mean
+
+    def spy(self, name, window):
+        computed.append((name, window))
+        return rolling_mean(self, name, window)
+    monkeypatch.setattr(FeatureFrame, "rolling_mean", spy)
+
+    @feature("smooth_x", inputs=["t", "nose_x", "nose_y"], windows=[("nose_x", 5)])
+    def smooth_x(frame):
+        return float(np.nanmean(frame.rolling_mean("nose_x", 5)))
+
+    compute_registered_features(_frames(), names=["smooth_x"])
+    assert set(computed) == {("nose_x", 5)}
+
+
+def test_rolling_mean_matches_pandas():
+    x = pd.Series([1.0, np.nan, 3.0, 4.0, np.nan, np.nan, 7.0, 8.0])
+    frame = FeatureFrame(pd.DataFrame({"x": x}), ["x"])
+    expected = x.rolling(3, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(frame.rolling_mean("x", 3), expected, rtol=1e-6)
+
+
+def test_builtin_features():
+    result = compute_registered_features(_frames(n=150))
+    assert result["nod_frequency"]["dominant_hz"] == pytest.approx(1.0, abs=0.25)
+    assert result["head_motion_energy"] > 0
+    assert result["emotion_trajectory"]["per_second"][:2] == ["Happiness", "Neutral"]
+    assert result["emotion_trajectory"]["shifts"] == 1
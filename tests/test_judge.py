@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_judge_does_not_load_preprocessor():
+    # 판결만 하는 실행(stage3_inference --batch)은 pandas/preprocessor를 로드하지 않아야 함
+    code = ("import sys, modules.judge; "
+            "print(','.join(m for m in ('pandas', 'modules.preprocessor', 'modules.seed_worker') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_llm_caches_are_opened_lazily():
+    # import만으로는 data/cache/*.sqlite를 만들지 않음 (처음 쓸 때 judge_cache()/draft_cache()가 생성)
+    code = ("import modules.judge as j, modules.guideline_maker as g; "
+            "print(j._judge_cache is None and g._draft_cache is None)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "True"
+
+
+METRICS = {
+    "duration_sec": 5.805630445480347,
+    "fps_mean": 7.145766012839518,
+    "dominant_emotion": {"emotion": "Sadness", "score": 29.465281441807747},
+    "emotion_full_stats": {"Anger": 4.46, "Contempt": 6.99, "Neutral": 57.17, "Sadness": 29.47, "Fear": None},
+    "posture": {"label": "Leaning Backward (Relaxed/Low Interest)", "z_diff": -0.05932605266571045},
+    "gesture": {"label": "Head Shaking (Negative/Confusion)", "var_x": 0.32004554509749944, "var_y": 0.0452},
+    "gaze": {"label": "Highly Focused (Stable Gaze)"},
+    "emotion_trajectory": {"per_second": ["Neutral", "Neutral", "Sadness", "Neutral"], "shifts": 2},
+}
+
+
+def _session(n=3):
+    return [{"option_title": f"선택지 {i}", "behavior_metrics": METRICS} for i in range(n)]
+
+
+def test_compact_metrics_level0():
+    from modules.judge import compact_metrics
+    m = compact_metrics(METRICS)
+    assert "fps_mean" not in m
+    assert m["duration_sec"] == 5.806
+    assert m["emotion_full_stats"] == {"Contempt": 6.99, "Neutral": 57.17, "Sadness": 29.47}
+    assert m["emotion_trajectory"] == {"per_second": "Neutral*2>Sadness>Neutral", "shifts": 2}
+    assert m["gesture"]["var_x"] == 0.32
+    assert "fps_mean" in METRICS  # 원본은 그대로
+
+
+def test_compact_metrics_level1_keeps_labels_only():
+    from modules.judge import compact_metrics
+    m = compact_metrics(METRICS, level=1)
+    assert set(m) == {"duration_sec", "dominant_emotion", "posture", "gesture", "gaze"}
+    assert m["posture"] == "Leaning Backward (Relaxed/Low Interest)"
+    assert m["gaze"] == "Highly Focused (Stable Gaze)"
+
+
+def test_build_judge_prompt_fits_cap():
+    from modules.judge import build_judge_prompt
+    guideline = "Step 1: 자세를 본다. Step 2: 시선을 본다.\n" * 400
+    full, full_tokens = build_judge_prompt("s1", _session(), guideline, cap=None)
+    assert "선택지 2" in full and "Neutral*2>Sadness>Neutral" in full
+
+    for cap in (full_tokens - 1, full_tokens // 2, full_tokens // 4):
+        prompt, tokens = build_judge_prompt("s1", _session(), guideline, cap=cap)
+        assert tokens <= cap
+        assert '"option_title":"선택지 2"' in prompt  # 선택지 데이터는 자르지 않음
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.log_writer import FrameLogWriter
+
+FIELDS = ["t", "fps", "top_emotion"]
+
+
+def _rows(start, n):
+    return pd.DataFrame({"t": np.arange(start, start + n) / 30.0, "fps": 30.0, "top_emotion": "Neutral"})
+
+
+def test_writes_all_rows_in_order(tmp_path):
+    writer = FrameLogWriter(str(tmp_path / "log.csv"), FIELDS, chunk_size=8, max_queue=2)
+    for start in range(0, 100, 5):
+        writer.write_frames(_rows(start, 5))
+    assert writer.close() == 100
+    df = pd.read_csv(tmp_path / "log.csv")
+    np.testing.assert_allclose(df["t"], np.arange(100) / 30.0)
+
+
+def test_stops_accepting_rows_after_write_error(tmp_path):
+    writer = FrameLogWriter(str(tmp_path / "log.csv"), FIELDS, chunk_size=1, max_queue=1)
+    writer.write_frames(_rows(0, 3))
+    writer.write_frames(pd.DataFrame({"t": [1.0]}))  # 컬럼이 빠진 chunk -> writer 스레드 오류
+    writer._thread.join(timeout=5.0)
+    assert not writer._thread.is_alive()
+
+    for start in range(10):  # 큐가 가득 차 있어도 멈추지 않고 버림
+        writer.write_frames(_rows(start, 2))
+    assert writer.close() == 3
+    assert writer.rows_dropped == 20
+
+
+def test_parquet_row_groups_are_batched(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    writer = FrameLogWriter(str(tmp_path / "log.csv"), FIELDS, fmt="parquet", chunk_size=4, row_group_size=64)
+    for start in range(0, 150, 2):
+        writer.write_frames(_rows(start, 2))
+    assert writer.close() == 150
+    meta = pq.ParquetFile(writer.path).metadata
+    assert meta.num_rows == 150
+    assert [meta.row_group(i).num_rows for i in range(meta.num_row_groups)] == [64, 64, 22]
@@ -0,0 +1,63 @@
+import glob
+import math
+import os
+
+import numpy as np
+import pytest
+
+from config import LOG_DIR
+from modules.online_features import OnlineBehaviorFeatures, RunningStats
+from modules.preprocessor import MISSING_VALUE, compute_behavior_metrics, load_frame_log
+
+LOGS = sorted(glob.glob(os.path.join(LOG_DIR, "*.csv")))
+
+
+def _online_metrics(df):
+    """batch와 같은 프레임을 녹화기처럼 한 행씩(-999 sentinel) OnlineBehaviorFeatures에 넣음"""
+    col = {c: i for i, c in enumerate(df.columns)}
+    rows = df.to_numpy(dtype=np.float64)
+    rows[np.isnan(rows)] = MISSING_VALUE
+    online = OnlineBehaviorFeatures(col)
+    for row in rows:
+        online.add(row)
+    return online.metrics()
+
+
+def _assert_close(a, b):
+    if isinstance(a, dict):
+        assert a.keys() == b.keys()
+        for k in a:
+            _assert_close(a[k], b[k])
+    elif isinstance(a, (tuple, list)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _assert_close(x, y)
+    elif isinstance(a, str):
+        assert a == b
+    elif math.isnan(a):
+        assert math.isnan(b)
+    else:
+        assert a == pytest.approx(b, rel=1e-12, abs=1e-12)
+
+
+def test_running_stats_matches_numpy():
+    values = np.random.default_rng(0).normal(size=200)
+    stats = RunningStats()
+    for x in values:
+        stats.add(float(x))
+    assert stats.std == pytest.approx(np.std(values, ddof=1), rel=1e-12)
+
+
+@pytest.mark.skipif(not LOGS, reason="data/logs에 로그가 없음")
+@pytest.mark.parametrize("path", LOGS, ids=os.path.basename)
+def test_online_matches_batch(path):
+    df = load_frame_log(path).astype(np.float64)  # float32 반올림 차이가 아니라 계산 방식을 비교
+    if "quality_level" not in df.columns:
+        df = df.assign(quality_level=0.0)  # 품질 조절 도입 전 로그
+    batch = compute_behavior_metrics(df)
+    online = _online_metrics(df)
+    if batch is None:
+        assert online is None
+        return
+    batch.pop("time_series")
+    _assert_close(online, batch)
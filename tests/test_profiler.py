@@ -0,0 +1,18 @@
+from modules.profiler import StageTimer
+
+
+def test_max_samples_keeps_most_recent():
+    timer = StageTimer(max_samples=3)
+    for ms in (1, 2, 3, 4, 5):
+        timer.record("pose", ms / 1000)
+    stats = timer.summary()["pose"]
+    assert stats["count"] == 3
+    assert stats["max_ms"] == 5.0 and stats["p50_ms"] == 4.0
+
+
+def test_reset_clears_samples():
+    timer = StageTimer()
+    timer.record("pose", 0.01)
+    timer.reset()
+    assert timer.summary() == {}
+    assert timer.overlay_lines() == []
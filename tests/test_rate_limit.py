@@ -0,0 +1,107 @@
+import pytest
+
+from modules import rate_limit
+from modules.rate_limit import TokenBucket, call_with_retry
+
+
+class FakeClock:
+    """time.monotonic / time.sleep 대체: sleep하면 시계만 앞으로 감"""
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket.per_minute(60, burst=4)  # 초당 1개, 최대 4개
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert sum(clock.slept) == pytest.approx(1.0)
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10.0  # 오래 쉬어도 capacity 이상 쌓이지 않음
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert sum(clock.slept) == pytest.approx(0.5)
+
+
+def test_bucket_sustained_rate(clock):
+    bucket = TokenBucket.per_minute(120, burst=1)
+    for _ in range(11):
+        bucket.acquire()
+    assert clock.now == pytest.approx(5.0)  # 첫 요청 이후 10개 x 0.5초
+
+
+class ResourceExhausted(Exception):
+    """google.api_core.exceptions.ResourceExhausted(429)와 같은 이름"""
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+def test_retry_on_retryable_error(clock):
+    limiter = CountingLimiter()
+    attempts = []
+
+    def flaky():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise ResourceExhausted("429")
+        return "ok"
+
+    assert call_with_retry(flaky, limiter=limiter, retries=4, base_delay=1.0) == "ok"
+    assert len(attempts) == 3
+    assert limiter.acquired == 3  # 재시도도 매번 속도 제한을 거침
+    assert len(clock.slept) == 2
+
+
+def test_no_retry_on_other_errors(clock):
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        call_with_retry(broken, retries=4)
+    assert len(attempts) == 1
+
+
+def test_gives_up_after_retries(clock):
+    attempts = []
+
+    def always_busy():
+        attempts.append(1)
+        raise ResourceExhausted("429")
+
+    with pytest.raises(ResourceExhausted):
+        call_with_retry(always_busy, retries=2, base_delay=1.0, max_delay=1.5)
+    assert len(attempts) == 3
+    assert all(d <= 1.5 for d in clock.slept)
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from modules.stimulus import OptionStreamParser
+
+OPTIONS = [
+    {"id": "opt1", "title": "괄호 {테스트}", "summary": "닫는 괄호 } 와 ] 가 문자열 안에 있음", "pros": ["a", "b"]},
+    {"id": "opt2", "title": "escaped \"quote\" {", "summary": "역슬래시 \\ 와 \\\"}\" 조합", "pros": []},
+    {"id": "opt3", "title": "중첩", "summary": "nested", "meta": {"scores": [1, {"x": "}"}]}},
+]
+
+
+def _response(fenced):
+    body = json.dumps({"options": OPTIONS}, ensure_ascii=False, indent=2)
+    return f"```json\n{body}\n```" if fenced else body
+
+
+def _feed_all(parser, text, step):
+    parsed = []
+    for i in range(0, len(text), step):
+        parsed += parser.feed(text[i:i + step])
+    return parsed
+
+
+@pytest.mark.parametrize("fenced", [False, True])
+@pytest.mark.parametrize("step", [1, 7, 64, 100000])
+def test_parser_yields_each_option_once(fenced, step):
+    parsed = _feed_all(OptionStreamParser(), _response(fenced), step)
+    assert parsed == OPTIONS
+
+
+def test_parser_yields_option_as_soon_as_it_closes():
+    text = _response(fenced=True)
+    first_end = text.index('"opt2"')  # 두 번째 객체가 시작되기 전
+    parser = OptionStreamParser()
+    assert parser.feed(text[:first_end]) == [OPTIONS[0]]
+    assert parser.feed(text[first_end:]) == OPTIONS[1:]
+
+
+def test_parser_waits_for_options_key():
+    parser = OptionStreamParser()
+    assert parser.feed('{"opt') == []
+    assert parser.feed('ions": [{"id": "opt1"}') == [{"id": "opt1"}]
+    assert parser.feed(']}') == []
@@ -0,0 +1,86 @@
+import pytest
+
+from modules import guideline_maker
+from modules.tokens import estimate_tokens, batch_by_tokens, truncate_to_tokens
+
+
+def test_estimate_tokens_ascii_and_korean():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("가나다") == 3
+
+
+def test_batch_by_tokens_keeps_order_and_budget():
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 40, "e" * 40]  # 각 10토큰
+    batches = batch_by_tokens(texts, 25)
+    assert [t for b in batches for t in b] == texts
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert all(sum(estimate_tokens(t) for t in b) <= 25 for b in batches)
+
+
+def test_batch_by_tokens_counts_separator():
+    texts = ["a" * 40] * 4  # 각 10토큰, 구분자 "\n"은 1토큰
+    batches = batch_by_tokens(texts, 21, separator="\n")
+    assert [len(b) for b in batches] == [2, 2]
+    assert all(estimate_tokens("\n".join(b)) <= 21 for b in batches)
+    assert [len(b) for b in batch_by_tokens(texts, 20, separator="\n")] == [1, 1, 1, 1]
+
+
+def test_batch_by_tokens_oversized_item_is_alone():
+    batches = batch_by_tokens(["a" * 8, "b" * 400, "c" * 8], 10)
+    assert batches == [["a" * 8], ["b" * 400], ["c" * 8]]
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens("short", 10) == "short"
+    cut = truncate_to_tokens("x" * 1000 + "가" * 100, 50)
+    assert estimate_tokens(cut) <= 50
+    assert cut.endswith("...(truncated)")
+
+
+def _spy_consolidate(monkeypatch, reply):
+    """consolidate_drafts를 LLM 없이 대체하고, 호출마다 프롬프트 추정 토큰을 기록"""
+    calls = []
+
+    def fake(drafts):
+        assert all(d.strip() for d in drafts), "빈 입력으로 통합하면 안 됨"
+        prompt = guideline_maker.CONSOLIDATE_SYSTEM_PROMPT + \
+            guideline_maker.CONSOLIDATE_USER_TEMPLATE.format(drafts="\n".join(drafts))
+        calls.append(estimate_tokens(prompt))
+        return reply(drafts)
+    monkeypatch.setattr(guideline_maker, "consolidate_drafts", fake)
+    return calls
+
+
+def test_consolidate_single_draft_batches_stay_under_budget(monkeypatch):
+    calls = _spy_consolidate(monkeypatch, lambda drafts: "summary " * 20)
+    guideline_maker.consolidate_hierarchical(["a" * 6000] * 5, budget=2000, max_workers=2)
+    assert len(calls) == 6  # draft별 5회 + 최종 1회
+    assert max(calls) <= 2000
+
+
+def test_consolidate_truncates_oversized_draft(monkeypatch):
+    calls = _spy_consolidate(monkeypatch, lambda drafts: "ok")
+    guideline_maker.consolidate_hierarchical(["b" * 40000], budget=2000)
+    assert len(calls) == 1 and calls[0] <= 2000
+
+
+def test_consolidate_stops_when_partials_do_not_shrink(monkeypatch):
+    calls = _spy_consolidate(monkeypatch, lambda drafts: "\n".join(drafts))
+    guideline_maker.consolidate_hierarchical(["c" * 5000] * 6, budget=2000, max_workers=2)
+    assert len(calls) == 7
+    assert max(calls) <= 2000
+
+
+def test_consolidate_many_inputs_never_blanks_them(monkeypatch):
+    # 입력 수가 많아 균등 몫이 MIN_INPUT_SHARE보다 작아도 빈 입력 없이 예산 안에서 끝나야 함
+    calls = _spy_consolidate(monkeypatch, lambda drafts: "\n".join(drafts))
+    guideline_maker.consolidate_hierarchical(["d" * 5000] * 40, budget=2000, max_workers=2)
+    assert max(calls) <= 2000
+
+
+def test_consolidate_rejects_budget_below_overhead(monkeypatch):
+    _spy_consolidate(monkeypatch, lambda drafts: "ok")
+    with pytest.raises(ValueError):
+        guideline_maker.consolidate_hierarchical(["a" * 8000, "b" * 8000], budget=300)